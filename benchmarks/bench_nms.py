@@ -0,0 +1,281 @@
+"""
+End-to-end benchmarks against a local mock NMS, see mocknms.py. Measures
+the latency of commands executed by CliHandler, the throughput of batch
+mode, render time and peak memory. Run from the repository root:
+
+    python benchmarks/bench_nms.py [-n <runs>] [-r <repetitions>]
+                                   [-d <devices>] [-j <jobs>]
+                                   [-D <devices per job>] [-l <diff lines>]
+                                   [-s <baseline file>] [-c <baseline file>]
+                                   [-t <tolerance in percent>] [-z]
+
+With -s the results are saved as a new baseline, with -c they are compared
+to a baseline and the exit status is 1 if anything is slower, or uses more
+memory, than the tolerance allows. All benchmarks are repeated and the
+median is used, changes within the noise between repetitions and results
+which are too noisy are not counted as regressions. The baseline in
+benchmarks/baseline.json was recorded with the default sizes.
+
+With -z the mock NMS compresses its responses with gzip. On localhost this
+only adds the time spent compressing and decompressing, it shows the cost
+of compression on a fast network.
+
+"""
+import contextlib
+import getopt
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the specification cache and the inventory out of the user's cache
+os.environ['XDG_CACHE_HOME'] = tempfile.mkdtemp()
+os.chdir(ROOT)
+
+from cli.command import CliHandler  # noqa: E402
+from cli.prettyprint import prettyprint  # noqa: E402
+from mocknms import MockNMS  # noqa: E402
+
+COMMANDS = [
+    'show devices',
+    'show devices | grep esk-0001 | count',
+    'show device 1',
+    'show jobs',
+    'show jobs status EXCEPTION',
+    'show job 1',
+    'show linknets',
+    'show files'
+]
+
+# Number of commands executed in batch mode
+BATCH = 200
+
+# A change has to be this many times larger than the noise to count as a
+# regression, results with more noise (in percent) are not compared
+NOISE_FACTOR = 3
+MAX_NOISE = 10.0
+
+# Shown but not compared. The peak memory of 'show job 1' switches between
+# two values about 30% apart from one run to the next, even after a
+# garbage collection, so a single run can't tell if it regressed.
+UNCOMPARED = ['memory show job 1']
+
+
+def median_ms(func, runs: int) -> float:
+    func()
+    times = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times) * 1000
+
+
+def peak_kib(func) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def batch_throughput(cli: CliHandler, count: int) -> float:
+    """
+    Execute show commands in batch mode, return commands per second
+
+    """
+
+    lines = ['show device %d\n' % (x % 100 + 1) for x in range(count)]
+    start = time.perf_counter()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        cli.batch(lines)
+
+    return count / (time.perf_counter() - start)
+
+
+def measure(cli: CliHandler, nms: MockNMS, runs: int) -> dict:
+    """
+    Run all benchmarks once, returns a dict with the results. Every result
+    has a value, a unit and whether lower or higher is better.
+
+    """
+
+    results = dict()
+
+    def result(name, value, unit, better='lower'):
+        results[name] = {'value': value, 'unit': unit, 'better': better}
+
+    for command in COMMANDS:
+        result('execute ' + command,
+               median_ms(lambda: cli.execute(command), runs), 'ms')
+
+    for command in COMMANDS:
+        result('memory ' + command, peak_kib(lambda: cli.execute(command)),
+               'KiB')
+
+    result('batch %d show commands' % BATCH, batch_throughput(cli, BATCH),
+           'commands/s', 'higher')
+
+    devices = {'status': 'success', 'data': {'devices': nms.devices}}
+    job = {'status': 'success', 'data': {'jobs': [nms.jobs[0]]}}
+
+    result('render devices',
+           median_ms(lambda: prettyprint(devices, 'devices'), runs), 'ms')
+    result('render job', median_ms(lambda: prettyprint(job, 'job'), runs),
+           'ms')
+
+    return results
+
+
+def run(sizes: dict, runs: int, compress: bool, repetitions: int) -> dict:
+    """
+    Run all benchmarks a number of times after a warm-up round, which is
+    not counted. Every result is the median of the repetitions, the noise
+    is the median absolute deviation in percent of the median, so that one
+    disturbed repetition doesn't count.
+
+    """
+
+    rounds = []
+
+    with MockNMS(compress=compress, **sizes) as nms:
+        cli = CliHandler(nms.url, token='token', pager=False)
+        measure(cli, nms, runs)
+        for _ in range(repetitions):
+            rounds.append(measure(cli, nms, runs))
+
+    print('Median of %d repetitions, latencies are the median of %d runs' %
+          (repetitions, runs))
+
+    results = dict()
+
+    for name, first in rounds[0].items():
+        values = [x[name]['value'] for x in rounds]
+        value = statistics.median(values)
+        deviation = statistics.median([abs(x - value) for x in values])
+        noise = deviation / value * 100 if value else 0
+        results[name] = {'value': round(value, 3), 'noise': round(noise, 1),
+                         'unit': first['unit'], 'better': first['better']}
+        print('  %-45s %10.1f %-10s +/-%5.1f%%' %
+              (name, value, first['unit'], noise))
+
+    return results
+
+
+def compare(baseline: dict, results: dict, tolerance: float) -> bool:
+    """
+    Compare results to a baseline, returns False if anything regressed.
+
+    A change must be larger than the tolerance and larger than the noise
+    seen in the baseline and now to count as a regression. Results which
+    are too noisy to tell anything, and those in UNCOMPARED, are shown but
+    never fail the comparison.
+
+    """
+
+    ok = True
+
+    print('\nCompared to baseline, tolerance %.0f%%' % tolerance)
+
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+
+        before = baseline[name]['value']
+        change = (current['value'] - before) / before * 100 if before else 0
+
+        if current['better'] == 'higher':
+            change = -change
+
+        noise = max(baseline[name].get('noise', 0), current['noise'])
+        regressed = False
+
+        if name in UNCOMPARED:
+            note = 'not compared'
+        elif noise > MAX_NOISE:
+            note = 'noisy'
+        else:
+            regressed = change > max(tolerance, NOISE_FACTOR * noise)
+            note = 'REGRESSION' if regressed else ''
+
+        ok = ok and not regressed
+
+        print('  %-45s %10.1f %10.1f %+7.1f%% %s' %
+              (name, before, current['value'], change, note))
+
+    return ok
+
+
+def main(argv):
+    runs = 5
+    repetitions = 5
+    tolerance = 25.0
+    save = ''
+    baseline = ''
+    compress = False
+    sizes = {'devices': 1000, 'jobs': 100, 'job_devices': 100,
+             'diff_lines': 100}
+
+    opts, args = getopt.getopt(argv, 'n:r:d:j:D:l:s:c:t:z')
+    for opt, arg in opts:
+        if opt == '-n':
+            runs = int(arg)
+        if opt == '-r':
+            repetitions = int(arg)
+        if opt == '-d':
+            sizes['devices'] = int(arg)
+        if opt == '-j':
+            sizes['jobs'] = int(arg)
+        if opt == '-D':
+            sizes['job_devices'] = int(arg)
+        if opt == '-l':
+            sizes['diff_lines'] = int(arg)
+        if opt == '-s':
+            save = arg
+        if opt == '-c':
+            baseline = arg
+        if opt == '-t':
+            tolerance = float(arg)
+        if opt == '-z':
+            compress = True
+
+    with mock.patch('cli.prettyprint.terminal_size',
+                    return_value=(120, 40)), \
+            mock.patch('cli.terminal.terminal_size',
+                       return_value=(120, 40)):
+        results = run(sizes, runs, compress, repetitions)
+
+    if save != '':
+        with open(save, 'w') as fd:
+            json.dump({'sizes': sizes, 'compress': compress,
+                       'results': results}, fd, indent=2)
+            fd.write('\n')
+        print('\nBaseline saved to %s' % save)
+
+    if baseline != '':
+        with open(baseline) as fd:
+            data = json.load(fd)
+        if data['sizes'] != sizes:
+            print('\nThe baseline was recorded with other sizes: %s' %
+                  data['sizes'])
+        if data.get('compress', False) != compress:
+            print('\nThe baseline was recorded %s compression' %
+                  ('with' if data.get('compress', False) else 'without'))
+        if not compare(data['results'], results, tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
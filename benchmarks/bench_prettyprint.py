@@ -0,0 +1,145 @@
+"""
+Measure how long it takes to render large outputs: a listing of 10000
+devices and a job with a 5000 line configuration diff. Run from the
+repository root:
+
+    python benchmarks/bench_prettyprint.py [-n <runs>]
+
+"""
+import getopt
+import os
+import sys
+import timeit
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from cli.prettyprint import prettyprint, prettyprint_diff  # noqa: E402
+
+
+def synthetic_devices(count: int) -> dict:
+    """
+    Return a device listing as returned by the NMS
+
+    """
+
+    devices = [{
+        'id': x,
+        'hostname': 'esk-%05d' % x,
+        'site_id': None,
+        'description': 'Access switch %d' % x,
+        'management_ip': '10.%d.%d.%d' % (x // 65536, x // 256 % 256,
+                                          x % 256),
+        'dhcp_ip': None,
+        'infra_ip': None,
+        'oob_ip': None,
+        'serial': 'SN%08d' % x,
+        'ztp_mac': '0800.2700.%04x' % x,
+        'platform': 'eos',
+        'vendor': 'Arista',
+        'model': 'DCS-7050SX3',
+        'os_version': '4.24.2F',
+        'synchronized': True,
+        'state': 'MANAGED',
+        'device_type': 'ACCESS',
+        'confhash': 'a' * 40,
+        'last_seen': '2020-04-25 12:00:00',
+        'port': None
+    } for x in range(count)]
+
+    return {'status': 'success', 'data': {'devices': devices}}
+
+
+def synthetic_diff(lines: int) -> str:
+    """
+    Return a unified diff with the given number of lines
+
+    """
+
+    diff = ['@@ -1,%d +1,%d @@' % (lines, lines)]
+
+    for x in range(lines):
+        if x % 3 == 0:
+            diff.append('+interface Ethernet%d' % x)
+        elif x % 3 == 1:
+            diff.append('-   description old %d' % x)
+        else:
+            diff.append('    switchport access vlan %d' % x)
+
+    return '\n'.join(diff)
+
+
+def synthetic_job(lines: int) -> dict:
+    """
+    Return a finished job with one device and a large diff
+
+    """
+
+    job = {
+        'id': 1,
+        'status': 'FINISHED',
+        'scheduled_time': '2020-04-25 12:00:00',
+        'start_time': '2020-04-25 12:00:01',
+        'finish_time': '2020-04-25 12:01:00',
+        'scheduled_by': 'admin',
+        'comment': None,
+        'function_name': 'sync_devices',
+        'next_job_id': None,
+        'exception': None,
+        'finished_devices': ['esk-00001'],
+        'result': {
+            'devices': {
+                'esk-00001': {
+                    'failed': False,
+                    'job_tasks': [{
+                        'failed': False,
+                        'result': None,
+                        'diff': synthetic_diff(lines)
+                    }]
+                }
+            }
+        }
+    }
+
+    return {'status': 'success', 'data': {'jobs': [job]}}
+
+
+def measure(name: str, func, runs: int) -> None:
+    best = min(timeit.repeat(func, number=1, repeat=runs))
+    print('  %-40s %10.1f ms' % (name, best * 1000))
+
+
+def main(argv):
+    runs = 5
+
+    opts, args = getopt.getopt(argv, 'n:')
+    for opt, arg in opts:
+        if opt == '-n':
+            runs = int(arg)
+
+    devices = synthetic_devices(10000)
+    diff = synthetic_diff(5000)
+    job = synthetic_job(5000)
+
+    print('Render time, best of %d runs' % runs)
+
+    with mock.patch('cli.prettyprint.terminal_size',
+                    return_value=(120, 40)), \
+            mock.patch('cli.terminal.terminal_size',
+                       return_value=(120, 40)):
+        measure('show devices, 10000 devices',
+                lambda: prettyprint(devices, 'devices'), runs)
+        measure('show devices | detailed, 10000 devices',
+                lambda: prettyprint(devices, 'devices', ' detailed'), runs)
+        measure('show devices | grep esk-09, 10000 devices',
+                lambda: prettyprint(devices, 'devices', ' grep esk-09'),
+                runs)
+        measure('diff, 5000 lines',
+                lambda: prettyprint_diff(diff), runs)
+        measure('show job, 5000 line diff',
+                lambda: prettyprint(job, 'job'), runs)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
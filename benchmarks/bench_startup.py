@@ -0,0 +1,62 @@
+"""
+Measure the time from starting cli.py until the first prompt is shown.
+
+The CLI is started with an empty standard input, so it exits as soon as it
+tries to read the first command. Run from the repository root:
+
+    python benchmarks/bench_startup.py [-n <runs>] [-m <target in ms>]
+
+"""
+import getopt
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once() -> float:
+    """
+    Start the CLI once, return the wall clock time in milliseconds
+
+    """
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'cli.py', '-u', 'https://localhost',
+                    '-t', 'token'], cwd=ROOT, stdin=subprocess.DEVNULL,
+                   stdout=subprocess.DEVNULL, check=True)
+
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv):
+    runs = 20
+    target = 100.0
+
+    opts, args = getopt.getopt(argv, 'n:m:')
+    for opt, arg in opts:
+        if opt == '-n':
+            runs = int(arg)
+        if opt == '-m':
+            target = float(arg)
+
+    # The first run warms up the specification cache and the OS caches
+    run_once()
+    times = sorted(run_once() for _ in range(runs))
+    median = statistics.median(times)
+
+    print('Startup time to prompt (%d runs)' % runs)
+    print('  %-10s %8.1f ms' % ('min', times[0]))
+    print('  %-10s %8.1f ms' % ('median', median))
+    print('  %-10s %8.1f ms' % ('max', times[-1]))
+    print('  %-10s %8.1f ms' % ('target', target))
+
+    if median > target:
+        print('\nMedian startup time is above target.')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,279 @@
+"""
+A local stand-in for the CNaaS NMS API serving synthetic data, used by the
+benchmarks. It can also be started on its own to try the CLI against a
+large fabric:
+
+    python benchmarks/mocknms.py [-p <port>] [-d <devices>] [-j <jobs>]
+                                 [-D <devices per job>] [-l <diff lines>]
+                                 [-z]
+
+With -z responses are compressed with gzip when the client accepts it.
+
+    python cli.py -u http://127.0.0.1:<port>/api/v1.0 -t token
+
+"""
+import getopt
+import gzip
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from bench_prettyprint import synthetic_devices, synthetic_diff
+
+API = '/api/v1.0'
+
+# Job results contain this many unique diffs, the devices share them
+UNIQUE_DIFFS = 10
+
+FILTER = re.compile(r'filter\[(.+)\]')
+
+
+def synthetic_jobs(count: int, devices: list, job_devices: int,
+                   diff_lines: int) -> list:
+    """
+    Return a list of finished jobs, newest first. Every job has a result
+    for job_devices devices.
+
+    """
+
+    diffs = [synthetic_diff(diff_lines).replace(
+        '@@', '@@ variant %d' % x, 1) for x in range(UNIQUE_DIFFS)]
+    hostnames = [x['hostname'] for x in devices[:job_devices]]
+    result = {'devices': {
+        hostname: {
+            'failed': False,
+            'job_tasks': [{
+                'failed': False,
+                'result': None,
+                'diff': diffs[nr % UNIQUE_DIFFS]
+            }]
+        } for nr, hostname in enumerate(hostnames)
+    }}
+
+    return [{
+        'id': x,
+        'status': ['FINISHED', 'EXCEPTION', 'ABORTED'][x % 3],
+        'scheduled_time': '2020-04-25 12:00:00',
+        'start_time': '2020-04-25 12:00:01',
+        'finish_time': '2020-04-25 12:01:00',
+        'scheduled_by': 'admin',
+        'comment': 'Job %d' % x,
+        'ticket_ref': None,
+        'function_name': 'sync_devices',
+        'next_job_id': None,
+        'exception': None,
+        'change_score': 0,
+        'finished_devices': hostnames,
+        'result': result
+    } for x in range(count, 0, -1)]
+
+
+def synthetic_linknets(devices: list) -> list:
+    """
+    Return linknets connecting the devices in a chain
+
+    """
+
+    return [{
+        'id': nr,
+        'ipv4_network': '10.200.%d.%d/31' % (nr // 128, nr % 128 * 2),
+        'device_a_id': a['id'],
+        'device_a_ip': '10.200.%d.%d' % (nr // 128, nr % 128 * 2),
+        'device_a_port': 'Ethernet1',
+        'device_b_id': b['id'],
+        'device_b_ip': '10.200.%d.%d' % (nr // 128, nr % 128 * 2 + 1),
+        'device_b_port': 'Ethernet2',
+        'site_id': None,
+        'description': None
+    } for nr, (a, b) in enumerate(zip(devices, devices[1:]))]
+
+
+class MockNMS():
+    """
+    Serve synthetic data on a free port on localhost in a background
+    thread. Listings are paginated like the NMS does it and report the
+    total number of items in X-Total-Count. Only the fields given in the
+    fields query parameter are returned, if it is set.
+
+    """
+
+    def __init__(self, devices: Optional[int] = 1000,
+                 jobs: Optional[int] = 100,
+                 job_devices: Optional[int] = 100,
+                 diff_lines: Optional[int] = 100,
+                 port: Optional[int] = 0,
+                 compress: Optional[bool] = False) -> None:
+        self.devices = synthetic_devices(devices)['data']['devices']
+        self.jobs = synthetic_jobs(jobs, self.devices, job_devices,
+                                   diff_lines)
+        self.linknets = synthetic_linknets(self.devices)
+        self.files = ['EOS-4.%d.0F.swi' % x for x in range(20)]
+        self.compress = compress
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self.handler())
+        self.server.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return 'http://127.0.0.1:%d%s' % (self.server.server_address[1], API)
+
+    def start(self) -> 'MockNMS':
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'MockNMS':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def listing(self, name: str, items: list, query: dict) -> tuple:
+        """
+        Return one page of a listing and the total number of items
+
+        """
+
+        for key in query:
+            match = FILTER.match(key)
+            if match is not None:
+                items = [x for x in items
+                         if str(x.get(match.group(1))) == query[key][0]]
+
+        page = int(query.get('page', ['1'])[0])
+        per_page = int(query.get('per_page', ['100'])[0])
+        rows = items[(page - 1) * per_page:page * per_page]
+
+        if 'fields' in query:
+            fields = query['fields'][0].split(',')
+            rows = [{x: row[x] for x in row if x in fields} for row in rows]
+
+        return ({'status': 'success', 'data': {name: rows}}, len(items))
+
+    def get(self, path: str, query: dict) -> tuple:
+        """
+        Return the data and total count for a GET request, None if the
+        path is unknown.
+
+        """
+
+        parts = path[len(API):].strip('/').split('/')
+
+        if parts == ['devices']:
+            return self.listing('devices', self.devices, query)
+        elif parts == ['jobs']:
+            return self.listing('jobs', self.jobs, query)
+        elif parts[0] == 'device' and len(parts) == 2:
+            devices = [x for x in self.devices if str(x['id']) == parts[1]]
+            return ({'status': 'success', 'data': {'devices': devices}},
+                    None)
+        elif parts[0] == 'job' and len(parts) == 2:
+            jobs = [x for x in self.jobs if str(x['id']) == parts[1]]
+            return ({'status': 'success', 'data': {'jobs': jobs}}, None)
+        elif parts == ['linknets']:
+            return ({'status': 'success',
+                     'data': {'linknets': self.linknets}}, None)
+        elif parts == ['firmware']:
+            return ({'status': 'success', 'data': {'files': self.files}},
+                    None)
+        elif parts == ['system', 'version']:
+            return ({'status': 'success', 'data': {'version': '1.0.0'}},
+                    None)
+
+        return None
+
+    def handler(self):
+        nms = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            # Send headers and body in one go, otherwise delayed ACKs
+            # stall every response
+            wbufsize = 65536
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, code: int, data: dict,
+                     total: Optional[int] = None) -> None:
+                body = json.dumps(data).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                if nms.compress and 'gzip' in \
+                   self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body, compresslevel=6)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                if total is not None:
+                    self.send_header('X-Total-Count', str(total))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def read_body(self) -> None:
+                length = int(self.headers.get('Content-Length') or 0)
+                self.rfile.read(length)
+
+            def do_GET(self):
+                self.read_body()
+                uri = urlparse(self.path)
+                response = nms.get(uri.path, parse_qs(uri.query))
+                if response is None:
+                    self.send(404, {'status': 'error',
+                                    'message': 'Not found'})
+                else:
+                    self.send(200, *response)
+
+            def do_POST(self):
+                self.read_body()
+                self.send(200, {'status': 'success', 'data': 'Scheduled',
+                                'job_id': nms.jobs[0]['id']})
+
+            do_PUT = do_POST
+            do_DELETE = do_POST
+
+        return Handler
+
+
+def main(argv):
+    port = 8765
+    compress = False
+    sizes = dict()
+
+    opts, args = getopt.getopt(argv, 'p:d:j:D:l:z')
+    for opt, arg in opts:
+        if opt == '-p':
+            port = int(arg)
+        if opt == '-d':
+            sizes['devices'] = int(arg)
+        if opt == '-j':
+            sizes['jobs'] = int(arg)
+        if opt == '-D':
+            sizes['job_devices'] = int(arg)
+        if opt == '-l':
+            sizes['diff_lines'] = int(arg)
+        if opt == '-z':
+            compress = True
+
+    nms = MockNMS(port=port, compress=compress, **sizes)
+    print('Serving %s' % nms.url)
+
+    try:
+        nms.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,8 +1,12 @@
 import getopt
 import sys
+import time
 from urllib.parse import urlparse
 
 from cli.command import CliHandler
+from cli.inventory import Inventory
+from cli.timing import Timing
+from cli.watcher import JobWatcher
 
 
 def usage():
@@ -10,10 +14,47 @@ def usage():
     Print usage string
 
     """
-    print('cli.py -u <url> -t <token>')
+    print('cli.py -u <url> -t <token> [-p <connection pool size>] [-n] '
+          '[--cache | --no-cache] [--profile <file>] '
+          '[--connect-timeout <seconds>] [--read-timeout <seconds>] '
+          '[--retries <retries>] [-f <command file> [-c]]')
     sys.exit(0)
 
 
+def read_commands(filename):
+    """
+    Read commands from a file, or from standard in if filename is '-'
+
+    """
+
+    if filename == '-':
+        return sys.stdin.readlines()
+
+    try:
+        with open(filename, 'r') as fd:
+            return fd.readlines()
+    except OSError as e:
+        print('Could not read commands: %s' % str(e))
+        sys.exit(1)
+
+
+def get_number(arg, cast):
+    """
+    Convert an option to a number, which can't be negative
+
+    """
+
+    try:
+        number = cast(arg)
+    except ValueError:
+        usage()
+
+    if number < 0:
+        usage()
+
+    return number
+
+
 def get_domain(url):
     """
     Get domain name from URL
@@ -30,8 +71,16 @@ def get_domain(url):
 
 
 def main(argv):
+    started = time.perf_counter()
     url = ''
     token = ''
+    pool_size = 10
+    batch_file = ''
+    continue_on_error = False
+    pager = True
+    cache = False
+    profile = ''
+    policy = dict()
     banner = """
     _______   ,---.   .--.   ____       ____       .-'''-.
    /   __  \\  |    \\  |  | .'  __ `.  .'  __ `.   / _     \\
@@ -54,14 +103,39 @@ CNaaS - Command Line Interface\n
 """
 
     try:
-        opts, args = getopt.getopt(argv, 'u:t:')
+        opts, args = getopt.getopt(argv, 'u:t:p:f:cn',
+                                   ['cache', 'no-cache', 'profile=',
+                                    'connect-timeout=', 'read-timeout=',
+                                    'retries='])
     except getopt.GetoptError:
-        usage(argv)
+        usage()
     for opt, arg in opts:
         if opt == '-u':
             url = arg
         if opt == '-t':
             token = arg
+        if opt == '-p':
+            if not arg.isdigit() or int(arg) < 1:
+                usage()
+            pool_size = int(arg)
+        if opt == '-f':
+            batch_file = arg
+        if opt == '-c':
+            continue_on_error = True
+        if opt == '-n':
+            pager = False
+        if opt == '--cache':
+            cache = True
+        if opt == '--no-cache':
+            cache = False
+        if opt == '--profile':
+            profile = arg
+        if opt == '--connect-timeout':
+            policy['connect_timeout'] = get_number(arg, float)
+        if opt == '--read-timeout':
+            policy['read_timeout'] = get_number(arg, float)
+        if opt == '--retries':
+            policy['retries'] = get_number(arg, int)
 
     if token == '':
         usage()
@@ -69,10 +143,24 @@ CNaaS - Command Line Interface\n
         usage()
 
     domain = get_domain(url)
+
+    if profile != '':
+        Timing.profile(profile)
+
+    if batch_file != '':
+        cli = CliHandler(url, token=token, pool_size=pool_size, cache=cache,
+                         **policy)
+        sys.exit(cli.batch(read_commands(batch_file), continue_on_error))
+
     prompt = 'CNaaS NMS (%s)# ' % domain
 
     try:
-        cli = CliHandler(url, token=token, banner=banner, prompt=prompt)
+        cli = CliHandler(url, token=token, banner=banner, prompt=prompt,
+                         pool_size=pool_size, pager=pager, cache=cache,
+                         **policy)
+        Inventory.warm()
+        JobWatcher.start(cli.notify)
+        Timing.startup['ready'] = time.perf_counter() - started
         while True:
             cli.loop()
     except KeyboardInterrupt as e:
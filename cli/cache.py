@@ -0,0 +1,51 @@
+import os
+import pickle
+from typing import Any, Optional
+
+
+def cache_dir() -> str:
+    """
+    Return the directory where the CLI keeps its cached files
+
+    """
+
+    base = os.environ.get('XDG_CACHE_HOME',
+                          os.path.join(os.path.expanduser('~'), '.cache'))
+
+    return os.path.join(base, 'cnaas-cli')
+
+
+def cache_read(name: str) -> Optional[Any]:
+    """
+    Read a cached object, return None if there is no usable cache
+
+    """
+
+    try:
+        with open(os.path.join(cache_dir(), name), 'rb') as fd:
+            return pickle.load(fd)
+    except Exception:
+        return None
+
+
+def cache_write(name: str, data: Any) -> None:
+    """
+    Write an object to the cache. The file is replaced atomically so that
+    several CLI processes can share the cache. Failures are ignored, the
+    cache is only an optimization.
+
+    """
+
+    path = os.path.join(cache_dir(), name)
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+
+    try:
+        os.makedirs(cache_dir(), exist_ok=True)
+        with open(tmp, 'wb') as fd:
+            pickle.dump(data, fd, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
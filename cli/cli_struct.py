@@ -13,6 +13,7 @@ class f_cli_attribute_name(BaseModel):
     description: str = ''
     default: bool = None
     url_suffix: bool = False
+    filter: bool = False
     show: bool = False
     delete: bool = False
 
@@ -27,6 +28,9 @@ class f_cli_command_attributes(BaseModel):
     no_show: bool = False
     update: bool = False
     delete: bool = False
+    paginate: bool = False
+    cache_ttl: int = 0
+    projection: bool = False
 
 
 class f_cli_command(BaseModel):
@@ -3,10 +3,22 @@ import re
 import readline
 import sys
 import time
-from typing import Optional
-
-from cli.parser import CliParser
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from cli.fanout import fanout_arguments, is_fanout, show
+from cli.httpcache import ResponseCache
+from cli.inventory import Inventory
+from cli.modifiers import validate_modifiers
+from cli.monitor import monitor
+from cli.pager import page
+from cli.parser import get_parser
+from cli.policy import CircuitBreaker, RequestPolicy
 from cli.rest import Rest
+from cli.session import new_session
+from cli.timing import Timing
+from cli.trie import Trie
+from cli.watcher import JobWatcher
 
 
 class CliHandler():
@@ -14,7 +26,13 @@ class CliHandler():
                  prompt: Optional[str] = 'CNaaS# ',
                  model: Optional[str] = 'cnaas.yml',
                  token: Optional[str] = None,
-                 banner: Optional[str] = '') -> None:
+                 banner: Optional[str] = '',
+                 pool_size: Optional[int] = 10,
+                 pager: Optional[bool] = True,
+                 cache: Optional[bool] = False,
+                 connect_timeout: Optional[float] = 10.0,
+                 read_timeout: Optional[float] = 60.0,
+                 retries: Optional[int] = 2) -> None:
         """
         Constructur.
 
@@ -30,12 +48,31 @@ class CliHandler():
         self.url = url
         self.token = token
         self.prompt = prompt
-        self.cli = CliParser(model)
+        self.pool_size = pool_size
+        self.pager = pager
+        started = time.perf_counter()
+        self.cli = get_parser(model)
+        Timing.startup['spec'] = time.perf_counter() - started
+        Rest.cli = self.cli
+        new_session(pool_size)
+        RequestPolicy.configure(connect_timeout, read_timeout, retries)
+        CircuitBreaker.reset()
+        Inventory.configure(url, token)
+        JobWatcher.configure(url, token)
+        ResponseCache.configure(cache)
         self.builtin = ['no', 'show', 'help', 'history', 'quit', 'update']
+        self.builtin_arguments = {'jobs': ['watched'],
+                                  'timing': ['on', 'off', 'show', 'export']}
         self.modifiers = ['|']
-        self.modifiers_commands = ['grep', 'monitor', 'detailed']
+        self.modifiers_commands = ['grep', 'exclude', 'head', 'count',
+                                   'monitor', 'detailed', 'refresh']
+        self.tries: dict = dict()
+        self.value_tries: dict = dict()
+        self.values_version = -1
+        self.completions: list = []
 
         readline.set_completer(self.complete)
+        readline.set_completer_delims(' \t\n')
         readline.parse_and_bind('?: complete')
         readline.parse_and_bind('"\\C-l": clear-screen')
 
@@ -73,42 +110,130 @@ class CliHandler():
         """
         Get possible commands based on what is already typed in.
 
+        Readline calls this once for every candidate with an increasing
+        state, the candidates are only looked up when state is 0.
+
         Returns a possible completion.
 
         """
+
+        # No stale completions if the lookup fails
+        if state == 0:
+            started = time.perf_counter()
+            self.completions = []
+            self.completions = self.candidates()
+            Timing.completion(time.perf_counter() - started)
+
+        try:
+            return self.completions[state]
+        except IndexError:
+            return None
+
+    def candidates(self) -> list:
+        """
+        Return all completions for what is already typed in
+
+        """
+
         line, full_line, command = self.read_line()
         commandlen = len(line.split(' '))
 
         if re.match(r'.+\|.*', line):
-            commands = self.modifiers_commands
+            context = ('modifiers', '')
         elif commandlen < 2 and not line.endswith(' '):
             if re.findall(r'\s*no.*', full_line):
-                commands = self.cli.get_delete() + self.modifiers
+                context = ('no', '')
             elif re.match(r'\s*update.*', full_line):
-                commands = self.cli.get_update() + self.modifiers
+                context = ('update', '')
             elif re.match(r'\s*show.*', full_line):
-                commands = self.cli.get_show() + self.modifiers
+                context = ('show', '')
             else:
-                commands = self.cli.get_not_show()
-                commands += self.modifiers + self.builtin
+                context = ('plain', '')
         else:
-            if re.findall(r'\s*show.*', full_line):
-                commands = self.cli.get_attributes_show(command)
-                commands += self.modifiers
+            is_show = re.findall(r'\s*show.*', full_line) != []
+            values = self.value_candidates(command, line.split(' '),
+                                           is_show)
+            if values is not None:
+                return values
+
+            if is_show:
+                context = ('show', command)
             elif re.findall(r'\s*no.*', full_line):
-                commands = self.cli.get_attributes_no(command) + self.modifiers
+                context = ('no', command)
             else:
-                commands = self.cli.get_attributes(command)
-                commands += self.modifiers
+                context = ('plain', command)
 
-        split_line = line.split(' ')[-1]
-        completions = [x for x in commands if x.startswith(split_line)]
+        return self.trie(*context).words(line.split(' ')[-1])
 
-        try:
-            return completions[state]
-        except IndexError:
+    def value_candidates(self, command: str, words: list,
+                         is_show: Optional[bool] = False) -> Optional[list]:
+        """
+        Return completions for the value of an attribute, for example
+        hostnames, from the inventory. Returns None if we are not at the
+        value of an attribute or if its values are unknown.
+
+        """
+
+        attributes = set(self.cli.get_attributes(command))
+
+        if is_show:
+            attributes = attributes | set(fanout_arguments(command))
+
+        if len(words) < 3 or words[-2] not in attributes:
             return None
 
+        values = Inventory.complete(command, words[-2])
+
+        if values is None:
+            return None
+
+        # The inventory has been refreshed since the trees were built
+        if self.values_version != Inventory.version:
+            self.values_version = Inventory.version
+            self.value_tries = dict()
+
+        key = (command, words[-2])
+
+        if key not in self.value_tries:
+            self.value_tries[key] = Trie(values)
+
+        return self.value_tries[key].words(words[-1])
+
+    def trie(self, context: str, command: str) -> Trie:
+        """
+        Return a prefix tree with the completions for a context, commands
+        if no command is given and otherwise attributes of the command.
+        The trees are built the first time they are needed.
+
+        """
+
+        if (context, command) in self.tries:
+            return self.tries[(context, command)]
+
+        if context == 'modifiers':
+            words = self.modifiers_commands
+        elif command == '':
+            words = {'no': self.cli.get_delete,
+                     'update': self.cli.get_update,
+                     'show': self.cli.get_show,
+                     'plain': self.cli.get_not_show}[context]()
+            words += self.modifiers
+            if context == 'plain':
+                words += self.builtin + list(self.builtin_arguments)
+        elif context == 'plain' and command in self.builtin_arguments:
+            words = list(self.builtin_arguments[command])
+        else:
+            words = {'no': self.cli.get_attributes_no,
+                     'show': self.cli.get_attributes_show,
+                     'plain': self.cli.get_attributes}[context](command)
+            if context == 'show':
+                words += fanout_arguments(command)
+            words += self.modifiers
+
+        self.tries[(context, command)] = Trie(words)
+
+        return self.tries[(context, command)]
+
     def helptext_all_commands(self):
         """
         Print helptexts for all commands
@@ -119,12 +244,21 @@ class CliHandler():
         print('  %-20s Disable the command that follows' % 'no')
         print('  %-20s Print this helptext' % 'help')
         print('  %-20s Print command history' % 'history')
+        print('  %-20s Show jobs started in this session' % 'jobs watched')
         print('  %-20s Show the command that follows' % 'show')
+        print('  %-20s Time commands, "timing off" to stop, "timing" for '
+              'a summary, "timing export <file>" to save as JSON' %
+              'timing on')
         print('  %-20s Quit the CLI' % 'quit')
         print('\nModifiers')
-        print('  %-20s Grep after a given string' % 'grep')
+        print('  %-20s Grep after a given string, -i to ignore case, -E for '
+              'regular expressions, -m <n> to stop after n lines' % 'grep')
+        print('  %-20s Exclude lines with a given string' % 'exclude')
+        print('  %-20s Print the first lines, 10 by default' % 'head')
+        print('  %-20s Count the number of lines' % 'count')
         print('  %-20s Monitor the output of a show command' % 'monitor')
         print('  %-20s Print detailed information' % 'detailed')
+        print('  %-20s Do not use a cached response' % 'refresh')
         print('\nOther commands:')
 
         for command in self.cli.get_commands():
@@ -242,7 +376,7 @@ class CliHandler():
                 attributes = line.rstrip().split(' ')[1:]
                 command = line.split(' ')[0]
 
-        if command not in self.cli.get_commands():
+        if not self.cli.is_command(command):
             print('Command does not exist')
             return False
 
@@ -265,6 +399,17 @@ class CliHandler():
 
         return res
 
+    def split_modifier(self, line: str) -> tuple:
+        """
+        Split a line in the command and the modifiers, everything after
+        the first '|'. Modifiers can be chained, for example
+        'show devices | grep MANAGED | count'.
+        """
+
+        (line, separator, modifier) = line.partition('|')
+
+        return (line.lstrip().rstrip(), modifier)
+
     def strip(self, command: str) -> str:
         """
         Strip the command and return arguments.
@@ -279,17 +424,22 @@ class CliHandler():
         Return an error string if invalid.
         """
 
-        modifier = ''
+        return self.run(line)[1]
+
+    def run(self, line: str) -> tuple:
+        """
+        Execute commands.
 
-        if '|' in line:
-            modifier = line.split('|')[-1]
+        Returns a tuple with a boolean telling whether the command was
+        successful or not and the output.
+        """
 
-        line = line.split('|')[0].lstrip().rstrip()
+        (line, modifier) = self.split_modifier(line)
         command = line.split(' ')[0]
 
         # Empty command, silently ignore
         if line == '':
-            return ''
+            return (True, '')
 
         # Quit?
         if line == 'quit' or line == 'exit':
@@ -297,32 +447,156 @@ class CliHandler():
             sys.exit(0)
 
         if line == 'history':
-            return self.builtin_cmd('history')
+            return (True, self.builtin_cmd('history'))
 
-        # Valid command?
-        if not self.validate(line):
-            return 'Invalid command: %s\n\n' % line
+        if line == 'jobs watched':
+            return (True, JobWatcher.watched())
 
-        if self.is_show(line):
-            return Rest.get(self.strip(line), self.token, self.url,
-                            modifier=modifier)
+        if command == 'timing':
+            return self.timing(line)
+
+        # Valid command?
+        with Timing.phase('spec'):
+            valid = self.validate(line)
+
+        if not valid:
+            return (False, 'Invalid command: %s\n\n' % line)
+
+        error = validate_modifiers(modifier)
+        if error != '':
+            return (False, error + '\n\n')
+
+        if self.is_show(line) and is_fanout(self.strip(line)):
+            return show(self.strip(line), self.token, self.url,
+                        modifier=modifier, workers=self.pool_size)
+        elif self.is_show(line):
+            return Rest.request('GET', self.strip(line), self.token,
+                                self.url, modifier=modifier)
         elif self.is_no(line):
-            return Rest.delete(self.strip(line), self.token, self.url,
-                               modifier=modifier)
+            return Rest.request('DELETE', self.strip(line), self.token,
+                                self.url, modifier=modifier)
         elif self.is_update(line):
-            return Rest.put(self.strip(line), self.token, self.url,
-                            modifier=modifier)
+            return Rest.request('PUT', self.strip(line), self.token,
+                                self.url, modifier=modifier)
         elif self.is_help(line):
-            return self.helptext(line)
+            return (True, self.helptext(line))
         else:
             if self.cli.get_use_put(command):
-                return Rest.put(line, self.token, self.url,
-                                modifier=modifier)
+                return Rest.request('PUT', line, self.token, self.url,
+                                    modifier=modifier)
             else:
-                return Rest.post(line, self.token, url=self.url,
-                                 modifier=modifier)
+                return Rest.request('POST', line, self.token, self.url,
+                                    modifier=modifier)
+
+    def timing(self, line: str) -> tuple:
+        """
+        The timing builtin, turn timing on or off, print a summary or
+        export the measurements.
+
+        """
+
+        args = line.split()[1:]
+
+        if args == ['on']:
+            Timing.configure(True)
+            return (True, 'Timing is on\n\n')
+        elif args == ['off']:
+            Timing.configure(False)
+            return (True, 'Timing is off\n\n')
+        elif args == [] or args == ['show']:
+            return (True, Timing.summary())
+        elif len(args) == 2 and args[0] == 'export':
+            try:
+                Timing.export(args[1])
+            except OSError as e:
+                return (False, 'Could not export timing: %s\n\n' % str(e))
+            return (True, 'Timing saved to %s\n\n' % args[1])
+
+        return (False, 'Usage: timing [on | off | show | export <file>]\n\n')
+
+    def run_timed(self, line: str) -> tuple:
+        """
+        Execute commands like run and measure them if timing is on
+        """
 
-        return 'I have no idea what to do with this command.\n'
+        with Timing.command(line):
+            return self.run(line)
+
+    def stream(self, line: str) -> Iterator[str]:
+        """
+        Execute commands and yield the output in chunks, so that long
+        listings are printed while they are downloaded.
+        """
+
+        (command, modifier) = self.split_modifier(line)
+
+        with Timing.command(line):
+            if self.is_show(command) and validate_modifiers(modifier) == '' \
+               and not is_fanout(self.strip(command)):
+                yield from Rest.stream('GET', self.strip(command), self.token,
+                                       self.url, modifier=modifier)
+            else:
+                yield self.execute(line)
+
+    def batch(self, lines: list,
+              continue_on_error: Optional[bool] = False) -> int:
+        """
+        Execute a list of commands non-interactively. All commands are
+        validated before anything is executed. Consecutive show commands
+        are read-only and are executed concurrently, everything else is
+        executed in order.
+
+        Unless continue_on_error is set we stop at the first failed
+        command.
+
+        Returns the exit status, 0 if all commands were successful.
+        """
+
+        commands = []
+        status = 0
+
+        for nr, line in enumerate(lines, start=1):
+            line = line.strip()
+            if line == '' or line.startswith('#'):
+                continue
+            (command, modifier) = self.split_modifier(line)
+            error = validate_modifiers(modifier)
+            if re.match(r'.*\|\s*monitor', line):
+                print('Line %d: Can not monitor in batch mode.' % nr)
+                status = 1
+            elif not self.validate(command):
+                print('Line %d: Invalid command: %s' % (nr, line))
+                status = 1
+            elif error != '':
+                print('Line %d: %s' % (nr, error))
+                status = 1
+            commands.append(line)
+
+        if status != 0:
+            return status
+
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            while commands != []:
+                if self.is_show(commands[0]):
+                    count = 1
+                    while count < len(commands) and \
+                            self.is_show(commands[count]):
+                        count += 1
+                else:
+                    count = 1
+
+                group = commands[:count]
+                commands = commands[count:]
+
+                for success, output in executor.map(self.run_timed, group):
+                    print(output, end='')
+                    if success:
+                        continue
+                    status = 1
+                    if not continue_on_error:
+                        return status
+
+        return status
 
     def print_suggestions(self, substitution: str, matches: list,
                           longest_match_length: int) -> None:
@@ -347,6 +621,10 @@ class CliHandler():
                     description = 'Display details'
                 elif match == 'update':
                     description = 'Update the command that follows'
+                elif match == 'jobs' and len(cmdlist) == 1:
+                    description = 'Show jobs started in this session'
+                elif match == 'timing' and len(cmdlist) == 1:
+                    description = 'Time commands'
                 elif match == 'exit' or match == 'quit':
                     description = 'Exit the CLI'
                 elif match == '|':
@@ -354,6 +632,9 @@ class CliHandler():
                 else:
                     description = self.cli.get_command_description(match)
                 print('  %-20s %s' % (match, description))
+        elif cmdlist[0] in self.builtin_arguments:
+            for match in matches:
+                print('  %s' % match)
         else:
             if cmdlist[0] in self.builtin:
                 command = cmdlist[1]
@@ -372,6 +653,17 @@ class CliHandler():
         print('')
         print(self.prompt, line, sep='', end='', flush=True)
 
+    def notify(self, message: str) -> None:
+        """
+        Print a message above the prompt without disturbing what is being
+        typed, the prompt and the line buffer are printed again after it.
+
+        """
+
+        print('\r\033[K' + message)
+        print(self.prompt, readline.get_line_buffer(), sep='', end='',
+              flush=True)
+
     def loop(self) -> None:
         """
         Main loop
@@ -380,30 +672,33 @@ class CliHandler():
 
         self.old_completer = readline.get_completer()
 
-        line = input(self.prompt)
-        job_status = r'.*Status:.*(FINISHED|ABORTED|EXCEPTION)'
+        for message in JobWatcher.prompt(True):
+            print(message)
+
+        try:
+            line = input(self.prompt)
+        finally:
+            JobWatcher.prompt(False)
 
         if re.match(r'.*\|*monitor', line):
+            command, modifier = self.split_modifier(line)
+            error = validate_modifiers(modifier)
             if not line.startswith('show '):
                 print('Can only monitor show commands.')
+            elif error != '':
+                print(error)
             else:
-                while True:
-                    line = line.partition('|')[0].rstrip()
-                    try:
-                        print(chr(27) + "[2J")
-                        output = self.execute(line)
-                        output += '\n\nHit Ctrl+C to abort'
-                        print(output)
-
-                        if re.findall(job_status, output):
-                            print('Job is not running, stopping monitor.')
-                            break
-
-                        time.sleep(2)
-                    except KeyboardInterrupt:
-                        break
+                monitor(self.strip(command), self.token, self.url,
+                        modifier=modifier, workers=self.pool_size).run()
+        elif self.pager:
+            page(self.stream(line))
         else:
-            print(self.execute(line), end='')
+            for output in self.stream(line):
+                print(output, end='', flush=True)
+
+        record = Timing.last()
+        if record is not None:
+            print(Timing.format(record))
 
         readline.set_completer(self.old_completer)
         readline.write_history_file('history.txt')
@@ -0,0 +1,124 @@
+import hashlib
+import re
+from typing import Callable, Iterable, Optional, Tuple
+
+# Parts of configuration diffs which change every time the configuration
+# is generated, for example timestamps in comments. They are replaced
+# before diffs are grouped so that devices which only differ in these
+# parts end up in the same group.
+VOLATILE_PATTERNS = [
+    (re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?'
+                r'(Z|[+-]\d{2}:?\d{2})?'), '<timestamp>'),
+    (re.compile(r'(Mon|Tue|Wed|Thu|Fri|Sat|Sun) '
+                r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) +\d+ '
+                r'\d{2}:\d{2}:\d{2}( \d{4})?'), '<timestamp>'),
+]
+
+
+def normalize_diff(diff: str, patterns: Optional[list] = None) -> str:
+    """
+    Replace volatile parts of a diff, such as timestamps
+
+    """
+
+    if patterns is None:
+        patterns = VOLATILE_PATTERNS
+
+    for pattern, replacement in patterns:
+        diff = pattern.sub(replacement, diff)
+
+    return diff
+
+
+def fingerprint(*parts: object) -> str:
+    """
+    Return a short hash of a diff and anything else that should be the
+    same for devices to be grouped together.
+
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+
+    for part in parts:
+        digest.update(str(part).encode('utf-8', 'replace'))
+        digest.update(b'\0')
+
+    return digest.hexdigest()
+
+
+def device_result(result: dict) -> Tuple[Optional[str], bool, object]:
+    """
+    Return the diff, whether it failed and the reason for a single device
+    in a job result. If several tasks have a diff the last one is used.
+
+    """
+
+    diff = None
+    reason = None
+
+    for task in result['job_tasks']:
+        if task['failed'] and task['result']:
+            reason = task['result']
+        if task['diff'] is not None:
+            diff = task['diff']
+
+    return (diff, result['failed'], reason)
+
+
+class DiffGroups():
+    """
+    Group devices with the same diff, failure and reason.
+
+    Devices are added one at a time, each raw diff is hashed and only the
+    first diff of every group is kept and rendered. The memory used is
+    bounded by the number of unique diffs, not the number of devices.
+
+    """
+
+    def __init__(self, render: Callable,
+                 normalize: Optional[bool] = True) -> None:
+        self.render = render
+        self.normalize = normalize
+        self.groups: dict = dict()
+
+    def add(self, hostname: str, result: dict) -> None:
+        diff, failed, reason = device_result(result)
+
+        # Timestamps are ignored when grouping, the first diff of the
+        # group is shown as it is
+        key_diff = diff
+
+        if diff is not None:
+            diff = diff.strip()
+            key_diff = normalize_diff(diff) if self.normalize else diff
+
+        key = fingerprint(key_diff, failed, reason)
+
+        if key in self.groups:
+            self.groups[key]['hostnames'].append(hostname)
+            return
+
+        self.groups[key] = {
+            'diff': self.render(diff) if diff is not None else '',
+            'hostnames': [hostname],
+            'failed': failed,
+            'reason': reason
+        }
+
+
+def group_diffs(devices: Iterable[tuple], render: Callable,
+                normalize: Optional[bool] = True) -> dict:
+    """
+    Group the devices of a job, takes (hostname, result) pairs.
+
+    Returns a dict with fingerprints as keys and dicts with the rendered
+    diff, hostnames, failed and reason as values.
+
+    """
+
+    groups = DiffGroups(render, normalize)
+
+    for hostname, result in devices:
+        groups.add(hostname, result)
+
+    return groups.groups
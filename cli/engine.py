@@ -0,0 +1,488 @@
+import asyncio
+import importlib
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Optional
+
+from cli import session
+from cli.policy import (UNAVAILABLE, CircuitBreaker, NMSError, NMSTimeout,
+                        NMSUnreachable, RequestPolicy, root_cause)
+from cli.timing import Timing
+
+# httpx trace events and the phases they are timed as
+TRACE = {
+    'connection.connect_tcp': 'connect',
+    'connection.start_tls': 'tls'
+}
+
+
+_optional: dict = dict()
+
+
+def optional(name: str) -> Any:
+    """
+    Return an optional module, None if it is not installed
+
+    """
+
+    if name not in _optional:
+        try:
+            _optional[name] = importlib.import_module(name)
+        except ImportError:
+            _optional[name] = None
+
+    return _optional[name]
+
+
+def httpx_available() -> bool:
+    return optional('httpx') is not None
+
+
+def accept_encoding() -> str:
+    """
+    Return the compressions we accept, brotli needs an optional module.
+    Both httpx and requests decompress brotli when it is installed.
+
+    """
+
+    if optional('brotli') is not None or optional('brotlicffi') is not None:
+        return 'gzip, br'
+
+    return 'gzip'
+
+
+def loads(data: bytes) -> Any:
+    """
+    Decode JSON, with orjson if it is installed
+
+    """
+
+    orjson = optional('orjson')
+
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+class HTTPError(NMSError):
+    pass
+
+
+def timeout_error(connecting: bool) -> NMSTimeout:
+    (connect, read) = RequestPolicy.timeouts()
+
+    if connecting:
+        return NMSTimeout('Timed out connecting to the NMS after %gs' %
+                          connect)
+
+    return NMSTimeout('Timed out waiting for the NMS after %gs' % read)
+
+
+def connection_error(error: Exception, connecting: bool) -> NMSUnreachable:
+    cause = root_cause(error) or str(error) or type(error).__name__
+
+    if connecting:
+        return NMSUnreachable('Could not connect to the NMS: %s' % cause)
+
+    return NMSUnreachable('The connection to the NMS failed: %s' % cause)
+
+
+def httpx_error(error: Exception) -> Exception:
+    """
+    Return the NMSError for an exception from httpx, other exceptions are
+    returned as they are.
+
+    """
+
+    import httpx
+
+    if isinstance(error, httpx.TimeoutException):
+        return timeout_error(isinstance(error, httpx.ConnectTimeout))
+    if isinstance(error, httpx.TransportError):
+        return connection_error(error, isinstance(error, httpx.ConnectError))
+
+    return error
+
+
+def requests_error(error: Exception) -> Exception:
+    """
+    Return the NMSError for an exception from requests, other exceptions
+    are returned as they are.
+
+    """
+
+    from requests import exceptions
+    from urllib3.exceptions import NewConnectionError
+
+    if isinstance(error, exceptions.ConnectTimeout):
+        return timeout_error(True)
+    if isinstance(error, exceptions.Timeout):
+        return timeout_error(False)
+    if isinstance(error, exceptions.ConnectionError):
+        reason = getattr(error.args[0] if error.args else None, 'reason',
+                         None)
+        return connection_error(error,
+                                isinstance(reason, NewConnectionError))
+
+    return error
+
+
+class Response():
+    """
+    A response from the NMS, the same for both transports. The body is
+    read before the response is returned, unless it was streamed. Then it
+    is read from raw, a file-like object with the decoded body.
+
+    elapsed is the time from sending the request until the headers were
+    received, timing has the time spent connecting and setting up TLS.
+
+    """
+
+    def __init__(self, url: str, status_code: int, reason: str,
+                 headers: Any, elapsed: float,
+                 content: Optional[bytes] = None, raw: Any = None,
+                 timing: Optional[dict] = None) -> None:
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.elapsed = elapsed
+        self.content = content
+        self.raw = raw
+        self.timing = timing or dict()
+
+    def json(self) -> Any:
+        if self.content is None:
+            self.content = self.raw.read()
+
+        return loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise HTTPError('%d %s for url: %s' % (self.status_code,
+                                                  self.reason, self.url))
+
+
+class StreamReader():
+    """
+    Read a streamed httpx response from another thread than the event
+    loop, for parsers which want a file-like object. The client is given
+    back to the engine when the response has been read.
+
+    """
+
+    def __init__(self, response: Any, client: Any) -> None:
+        self.response = response
+        self.client = client
+        self.chunks = response.aiter_bytes()
+        self.buffer = bytearray()
+        self.done = False
+
+    async def next_chunk(self) -> Optional[bytes]:
+        try:
+            return await self.chunks.__anext__()
+        except StopAsyncIteration:
+            await self.close()
+            return None
+        except Exception as e:
+            await self.close()
+            raise httpx_error(e)
+
+    async def close(self) -> None:
+        await self.response.aclose()
+        Engine.checkin(self.client)
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        while not self.done and (size < 0 or len(self.buffer) < size):
+            chunk = Engine.run(self.next_chunk())
+            if chunk is None:
+                self.done = True
+            else:
+                self.buffer += chunk
+
+        if size < 0:
+            size = len(self.buffer)
+
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+
+        return data
+
+
+class Engine():
+    """
+    All requests to the NMS are made on one asyncio event loop running in
+    a background thread, sharing one connection pool. Fan-out queries,
+    job watching and the inventory run as tasks on the loop, the rest of
+    the CLI hands requests over to the loop and waits for them.
+
+    httpx is used when it is installed. Otherwise the requests session is
+    used from a thread pool, so that requests still run concurrently.
+
+    Timeouts and retries follow RequestPolicy and requests are not sent
+    while the CircuitBreaker is open. Failures are raised as NMSError.
+
+    """
+
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    thread: Optional[threading.Thread] = None
+    lock = threading.Lock()
+    clients: list = []
+    idle: Optional[asyncio.LifoQueue] = None
+    executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def get_loop(cls) -> asyncio.AbstractEventLoop:
+        """
+        Return the event loop, it is started the first time it is needed
+
+        """
+
+        with cls.lock:
+            if cls.loop is None:
+                cls.loop = asyncio.new_event_loop()
+                cls.thread = threading.Thread(target=cls.loop.run_forever,
+                                              daemon=True)
+                cls.thread.start()
+
+            return cls.loop
+
+    @classmethod
+    def in_loop(cls) -> bool:
+        return cls.thread is not None and \
+            threading.get_ident() == cls.thread.ident
+
+    @classmethod
+    def submit(cls, coroutine: Coroutine) -> Future:
+        """
+        Run a coroutine on the event loop without waiting for it
+
+        """
+
+        return asyncio.run_coroutine_threadsafe(coroutine, cls.get_loop())
+
+    @classmethod
+    def run(cls, coroutine: Coroutine) -> Any:
+        """
+        Run a coroutine on the event loop and wait for the result. This
+        must not be called from the loop itself.
+
+        """
+
+        if cls.in_loop():
+            coroutine.close()
+            raise RuntimeError('Can not wait for the event loop in the '
+                               'event loop')
+
+        return cls.submit(coroutine).result()
+
+    @classmethod
+    def call_soon(cls, callback: Callable) -> None:
+        cls.get_loop().call_soon_threadsafe(callback)
+
+    @classmethod
+    def send(cls, method: str, url: str, **kwargs) -> Response:
+        """
+        Make a request and wait for the response, see request
+
+        """
+
+        return cls.run(cls.request(method, url, **kwargs))
+
+    @classmethod
+    async def request(cls, method: str, url: str,
+                      headers: Optional[dict] = None, json: Any = None,
+                      stream: Optional[bool] = False) -> Response:
+        """
+        Make a request to the NMS. When stream is set the body of a
+        successful response is not read before the response is returned.
+        Raises NMSError if the NMS can't be reached.
+
+        GET requests are retried while the NMS is unavailable, until they
+        succeed or we run out of retries.
+
+        """
+
+        attempts = RequestPolicy.attempts(method)
+        headers = dict(headers or dict())
+        headers.setdefault('Accept-Encoding', accept_encoding())
+
+        CircuitBreaker.check()
+
+        # The circuit breaker counts requests, not attempts
+        for attempt in range(attempts):
+            try:
+                res = await cls.transport(method, url, headers, json, stream)
+            except NMSError as e:
+                if attempt == attempts - 1:
+                    CircuitBreaker.failure(str(e))
+                    raise
+            else:
+                if res.status_code not in UNAVAILABLE:
+                    CircuitBreaker.success()
+                    return res
+                if attempt == attempts - 1:
+                    CircuitBreaker.failure('%d %s' % (res.status_code,
+                                                      res.reason))
+                    return res
+
+            await asyncio.sleep(RequestPolicy.delay(attempt))
+
+    @classmethod
+    async def transport(cls, method: str, url: str, headers: Optional[dict],
+                        json: Any, stream: bool) -> Response:
+        """
+        Make one request with httpx, or requests if it isn't installed
+
+        """
+
+        if httpx_available():
+            return await cls.request_httpx(method, url, headers, json,
+                                           stream)
+
+        return await cls.request_requests(method, url, headers, json,
+                                          stream)
+
+    @classmethod
+    async def checkout(cls) -> Any:
+        """
+        Take an httpx client to make one request with, it is given back
+        with checkin when the response has been read. There are as many
+        clients as connections in the requests session.
+
+        Every client has a single connection and makes one request at a
+        time. httpcore gives requests which arrive together the same idle
+        connection and retries all but one of them, with one shared pool
+        that costs more than the requests themselves in batch mode.
+
+        """
+
+        if cls.idle is None:
+            cls.idle = asyncio.LifoQueue()
+
+        if cls.idle.empty() and len(cls.clients) < session.pool_size():
+            import httpx
+
+            client = httpx.AsyncClient(
+                verify=False, timeout=None, follow_redirects=True,
+                limits=httpx.Limits(max_connections=1,
+                                    max_keepalive_connections=1))
+            cls.clients.append(client)
+            return client
+
+        return await cls.idle.get()
+
+    @classmethod
+    def checkin(cls, client: Any) -> None:
+        # Clients from before close are not used again
+        if client in cls.clients:
+            cls.idle.put_nowait(client)
+
+    @classmethod
+    async def request_httpx(cls, method: str, url: str,
+                            headers: Optional[dict], json: Any,
+                            stream: bool) -> Response:
+        import httpx
+
+        client = await cls.checkout()
+        (connect, read) = RequestPolicy.timeouts()
+        timing: dict = dict()
+        started: dict = dict()
+
+        async def trace(event: str, info: dict) -> None:
+            (name, _, stage) = event.rpartition('.')
+            phase = TRACE.get(name)
+            if phase is None:
+                return
+            if stage == 'started':
+                started[phase] = time.perf_counter()
+            elif phase in started:
+                timing[phase] = timing.get(phase, 0.0) + \
+                    time.perf_counter() - started.pop(phase)
+
+        # Tracing costs time, it is only done when we are timing commands
+        extensions = {'trace': trace} if Timing.enabled else dict()
+        request = client.build_request(
+            method, url, headers=headers, json=json, extensions=extensions,
+            timeout=httpx.Timeout(read, connect=connect, pool=None))
+        sent = time.perf_counter()
+
+        res = None
+
+        try:
+            res = await client.send(request, stream=True)
+        except Exception as e:
+            raise httpx_error(e)
+        finally:
+            if res is None:
+                cls.checkin(client)
+
+        elapsed = time.perf_counter() - sent
+
+        if stream and res.status_code == 200:
+            return Response(url, res.status_code, res.reason_phrase,
+                            res.headers, elapsed,
+                            raw=StreamReader(res, client), timing=timing)
+
+        try:
+            content = await res.aread()
+        except Exception as e:
+            raise httpx_error(e)
+        finally:
+            await res.aclose()
+            cls.checkin(client)
+
+        return Response(url, res.status_code, res.reason_phrase, res.headers,
+                        elapsed, content=content, timing=timing)
+
+    @classmethod
+    async def request_requests(cls, method: str, url: str,
+                               headers: Optional[dict], json: Any,
+                               stream: bool) -> Response:
+        if cls.executor is None:
+            cls.executor = ThreadPoolExecutor(
+                max_workers=session.pool_size())
+
+        def send() -> Response:
+            try:
+                with Timing.capture() as timing:
+                    res = session.get_session().request(
+                        method, url, headers=headers, json=json,
+                        stream=stream, timeout=RequestPolicy.timeouts())
+
+                if stream and res.status_code == 200:
+                    res.raw.decode_content = True
+                    return Response(url, res.status_code, res.reason,
+                                    res.headers, res.elapsed.total_seconds(),
+                                    raw=res.raw, timing=timing)
+
+                return Response(url, res.status_code, res.reason,
+                                res.headers, res.elapsed.total_seconds(),
+                                content=res.content, timing=timing)
+            except Exception as e:
+                raise requests_error(e)
+
+        return await asyncio.get_running_loop().run_in_executor(cls.executor,
+                                                                send)
+
+    @classmethod
+    def close(cls) -> None:
+        """
+        Close all connections, the next request starts a new pool
+
+        """
+
+        clients = cls.clients
+        cls.clients = []
+        cls.idle = None
+
+        if cls.loop is not None and not cls.in_loop():
+            for client in clients:
+                cls.submit(client.aclose()).result()
+
+        if cls.executor is not None:
+            cls.executor.shutdown(wait=False)
+            cls.executor = None
@@ -0,0 +1,159 @@
+import asyncio
+import fnmatch
+from typing import Optional
+
+from cli.engine import Engine
+from cli.inventory import Inventory
+from cli.policy import describe
+from cli.prettyprint import prettyprint
+from cli.rest import Rest
+
+# Commands that can be shown for several devices at once. For each command
+# we have the command used to get a single device and the name of the
+# table we merge the results into.
+FANOUT_COMMANDS = {
+    'device': ('device id %(id)s', 'devices'),
+    'interfaces': ('interfaces hostname %(hostname)s', 'interfaces'),
+}
+
+# Arguments only known by fan-out, they are not part of the specification
+# since they are never sent to the NMS
+FANOUT_ARGUMENTS = ['group']
+
+
+def get_args(line: str) -> dict:
+    """
+    Return the arguments of a command as a dict
+
+    """
+
+    args = line.rstrip().split(' ')[1:]
+
+    return dict(zip(args[0::2], args[1::2]))
+
+
+def fanout_arguments(command: str) -> list:
+    """
+    Return the extra arguments a show command takes for fan-out
+
+    """
+
+    if command not in FANOUT_COMMANDS:
+        return []
+
+    return list(FANOUT_ARGUMENTS)
+
+
+def is_fanout(line: str) -> bool:
+    """
+    Find out if a show command should be sent to several devices. This is
+    the case when we have a group or a list of hostnames, or a hostname
+    with wildcards.
+
+    """
+
+    if line.split(' ')[0] not in FANOUT_COMMANDS:
+        return False
+
+    args = get_args(line)
+
+    if 'group' in args:
+        return True
+    if 'hostname' in args:
+        return any(x in args['hostname'] for x in [',', '*', '?', '['])
+
+    return False
+
+
+def get_targets(line: str, token: str, url: str) -> list:
+    """
+    Return the devices a show command should be sent to, a list of dicts
+    with device ID and hostname.
+
+    """
+
+    args = get_args(line)
+    devices = Inventory.hostnames()
+    hostnames: set = set()
+
+    if 'group' in args:
+        groups = Rest.fetch('groups', token, url)['data']['groups']
+        hostnames.update(groups.get(args['group'], []))
+
+    if 'hostname' in args:
+        patterns = args['hostname'].split(',')
+        hostnames.update(x for x in devices.values()
+                         if any(fnmatch.fnmatchcase(x, pattern)
+                                for pattern in patterns))
+
+    return [{'id': x, 'hostname': devices[x]} for x in devices
+            if devices[x] in hostnames]
+
+
+async def get_device_data(command: str, target: dict, token: str,
+                          url: str) -> list:
+    """
+    Get data for a single device. Returns a list of rows where each row
+    starts with the hostname of the device.
+
+    """
+
+    line = FANOUT_COMMANDS[command][0] % target
+    data = (await Rest.afetch(line, token, url))['data']
+
+    if command == 'device':
+        return [data['devices'][0]]
+
+    return [dict({'hostname': target['hostname']}, **row) for row in
+            data[command]]
+
+
+def show(line: str, token: str, url: str, modifier: Optional[str] = '',
+         workers: Optional[int] = 10) -> tuple:
+    """
+    Send a show command to several devices concurrently and merge the
+    results into a single table.
+
+    Returns a tuple with a boolean telling whether all devices were
+    successful or not and the output.
+
+    """
+
+    command = line.split(' ')[0]
+    table = FANOUT_COMMANDS[command][1]
+    rows: list = []
+    errors = ''
+
+    try:
+        targets = get_targets(line, token, url)
+    except Exception as e:
+        return (False, 'Could not get list of devices: %s\n\n' % describe(e))
+
+    if targets == []:
+        return (False, 'No matching devices\n\n')
+
+    async def fetch(target, limit):
+        async with limit:
+            try:
+                return (target, await get_device_data(command, target, token,
+                                                      url))
+            except Exception as e:
+                return (target, e)
+
+    async def fetch_all():
+        limit = asyncio.Semaphore(workers)
+        return await asyncio.gather(*[fetch(x, limit) for x in targets])
+
+    for target, result in Engine.run(fetch_all()):
+        if isinstance(result, Exception):
+            errors += '  %s: Could not execute command: %s\n' % \
+                (target['hostname'], describe(result))
+        else:
+            rows += result
+
+    output = prettyprint({'data': {table: rows}}, table, modifier=modifier)
+
+    if errors != '':
+        output += '\033[91m%s\033[0m\n' % errors
+
+    return (errors == '', output)
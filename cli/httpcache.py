@@ -0,0 +1,143 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Optional
+
+from cli.cache import cache_read, cache_write
+
+
+class ResponseCache():
+    """
+    Opt-in cache of responses to show commands, saved in the cache
+    directory and shared between sessions.
+
+    Only commands with a cache_ttl in the specification are cached.
+    Fresh responses are used without asking the NMS, older responses are
+    revalidated with a conditional request when the NMS gave us an ETag
+    or Last-Modified header. A successful write to an endpoint removes
+    all cached responses with the same first path component, for example
+    a POST to /firmware/upgrade removes the cached /firmware.
+
+    """
+
+    name: str = 'responses'
+    enabled: bool = False
+    lock = threading.Lock()
+    entries: dict = dict()
+
+    @classmethod
+    def configure(cls, enabled: bool) -> None:
+        cls.enabled = enabled
+
+    @classmethod
+    def load(cls) -> dict:
+        """
+        Read the cached responses. They are read again every time, other
+        CLI processes may have changed them.
+
+        """
+
+        cls.entries = cache_read(cls.name) or dict()
+
+        return cls.entries
+
+    @classmethod
+    def save(cls) -> None:
+        cache_write(cls.name, cls.entries)
+
+    @classmethod
+    def root(cls, path: str) -> str:
+        """
+        Return the first component of the path of an endpoint, the path
+        is relative to the API as in the specification.
+
+        """
+
+        return '/' + path.lstrip('/').split('?')[0].split('/')[0]
+
+    @classmethod
+    def key(cls, url: str, args: dict) -> str:
+        return hashlib.sha1(json.dumps([url, args], sort_keys=True,
+                                       default=str).encode()).hexdigest()
+
+    @classmethod
+    def lookup(cls, url: str, args: dict) -> Optional[dict]:
+        """
+        Return the cached response for an URL and arguments, a dict with
+        the time it was stored, validators and the decoded data.
+
+        """
+
+        with cls.lock:
+            return cls.load().get(cls.key(url, args))
+
+    @classmethod
+    def is_fresh(cls, entry: dict, ttl: int) -> bool:
+        return time.time() - entry['stored'] < ttl
+
+    @classmethod
+    def validators(cls, entry: dict) -> dict:
+        """
+        Return headers for a conditional request
+
+        """
+
+        headers = dict()
+
+        if entry['etag'] is not None:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified'] is not None:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        return headers
+
+    @classmethod
+    def store(cls, path: str, url: str, args: dict, data: dict,
+              headers: Optional[dict] = None) -> None:
+        """
+        Store a response, path is the endpoint in the specification
+
+        """
+
+        headers = headers or dict()
+
+        with cls.lock:
+            cls.load()[cls.key(url, args)] = {
+                'root': cls.root(path),
+                'stored': time.time(),
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'data': data
+            }
+            cls.save()
+
+    @classmethod
+    def touch(cls, url: str, args: dict) -> None:
+        """
+        The NMS told us that a cached response is still valid
+
+        """
+
+        with cls.lock:
+            entry = cls.load().get(cls.key(url, args))
+            if entry is not None:
+                entry['stored'] = time.time()
+                cls.save()
+
+    @classmethod
+    def invalidate(cls, path: str) -> None:
+        """
+        Remove cached responses related to an endpoint
+
+        """
+
+        root = cls.root(path)
+
+        with cls.lock:
+            entries = cls.load()
+            related = [key for key in entries if entries[key]['root'] == root]
+            for key in related:
+                del entries[key]
+            if related != []:
+                cls.save()
@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Optional
+
+from cli.cache import cache_read, cache_write
+from cli.engine import Engine
+from cli.rest import FIELDS, Rest
+
+# Commands that can add, remove or rename devices
+DEVICE_COMMANDS = ['device', 'device_init']
+
+# Where the values of an attribute can be completed from, either for all
+# commands or only for one command
+VALUES = {
+    ('', 'hostname'): 'hostnames',
+    ('', 'group'): 'groups',
+    ('', 'filename'): 'firmware',
+    ('device', 'id'): 'device_ids',
+    ('device_init', 'id'): 'device_ids',
+    ('job', 'id'): 'job_ids',
+    ('jobs', 'status'): 'statuses',
+}
+
+JOB_STATUSES = ['SCHEDULED', 'RUNNING', 'FINISHED', 'ABORTED', 'EXCEPTION']
+
+
+class Inventory():
+    """
+    Session level cache of the devices known by the NMS.
+
+    Hostnames, device IDs, groups, firmware images and recent job IDs are
+    also kept for completion. They are refreshed in the background and
+    saved in the cache directory, so they can be completed right after
+    the CLI has started.
+
+    """
+
+    url: str = ''
+    token: str = ''
+    ttl: int = 300
+    lock = threading.Lock()
+    devices: Optional[dict] = None
+    updated: float = 0.0
+    values: dict = dict()
+    version: int = 0
+
+    @classmethod
+    def configure(cls, url: str, token: str,
+                  ttl: Optional[int] = 300) -> None:
+        """
+        Set URL and token used to talk to the NMS and start with an empty
+        cache.
+
+        """
+
+        cls.url = url
+        cls.token = token
+        cls.ttl = ttl
+        cls.invalidate()
+        cls.set_values(cache_read(cls.cache_name()) or dict())
+
+        if cls.hook not in Rest.hooks:
+            Rest.add_hook(cls.hook)
+
+    @classmethod
+    def hook(cls, method: str, command: str, data: dict) -> None:
+        """
+        Invalidate the cache when devices are changed
+
+        """
+
+        if method != 'GET' and command in DEVICE_COMMANDS:
+            cls.invalidate()
+
+    @classmethod
+    def invalidate(cls) -> None:
+        with cls.lock:
+            cls.devices = None
+
+    @classmethod
+    def hostnames(cls) -> dict:
+        """
+        Return a dict of device IDs and hostnames. The list of devices is
+        downloaded from the NMS when the cache is empty or too old. Raises
+        an exception if the download fails.
+
+        """
+
+        with cls.lock:
+            if cls.devices is not None and \
+               time.monotonic() - cls.updated <= cls.ttl:
+                return cls.devices
+
+        # The lock is not held while downloading, the event loop doing the
+        # download may need it.
+        devices = Rest.fetch_all('/devices', 'devices', cls.token, cls.url)
+
+        return cls.set_devices(devices)
+
+    @classmethod
+    def set_devices(cls, devices: list) -> dict:
+        with cls.lock:
+            cls.devices = {x['id']: x['hostname'] for x in devices}
+            cls.updated = time.monotonic()
+
+            return cls.devices
+
+    @classmethod
+    def cache_name(cls) -> str:
+        """
+        Name of the file the values are saved in, one per NMS
+
+        """
+
+        return 'inventory-%s' % hashlib.sha1(cls.url.encode()).hexdigest()
+
+    @classmethod
+    def set_values(cls, values: dict) -> None:
+        with cls.lock:
+            cls.values = values
+            cls.version += 1
+
+    @classmethod
+    async def refresh(cls) -> None:
+        """
+        Download everything used for completion concurrently and save it.
+        Whatever can't be downloaded is kept from the last time.
+
+        """
+
+        values = dict(cls.values)
+        (devices, groups, files, jobs) = await asyncio.gather(
+            Rest.afetch_all('/devices', 'devices', cls.token, cls.url),
+            Rest.afetch('groups', cls.token, cls.url),
+            Rest.afetch('files', cls.token, cls.url),
+            Rest.aget(cls.url + '/jobs?sort=-id&page=1&per_page=100&%s=id' %
+                      FIELDS, cls.token),
+            return_exceptions=True)
+
+        # Failed downloads are returned as exceptions, which fail here too
+        try:
+            hostnames = cls.set_devices(devices)
+            values['hostnames'] = sorted(hostnames.values())
+            values['device_ids'] = [str(x) for x in sorted(hostnames)]
+        except Exception:
+            pass
+
+        try:
+            values['groups'] = sorted(groups['data']['groups'])
+        except Exception:
+            pass
+
+        try:
+            values['firmware'] = sorted(files['data']['files'])
+        except Exception:
+            pass
+
+        try:
+            values['job_ids'] = [str(x['id']) for x in
+                                 jobs.json()['data']['jobs']]
+        except Exception:
+            pass
+
+        if values != cls.values:
+            cls.set_values(values)
+            cache_write(cls.cache_name(), values)
+
+    @classmethod
+    def complete(cls, command: str, attribute: str) -> Optional[list]:
+        """
+        Return known values for an attribute, None if the attribute can't
+        be completed. This never talks to the NMS.
+
+        """
+
+        name = VALUES.get((command, attribute), VALUES.get(('', attribute)))
+
+        if name is None:
+            return None
+        if name == 'statuses':
+            return JOB_STATUSES
+
+        return cls.values.get(name, [])
+
+    @classmethod
+    async def run(cls) -> None:
+        while True:
+            await cls.refresh()
+            await asyncio.sleep(cls.ttl)
+
+    @classmethod
+    def warm(cls) -> None:
+        """
+        Fill the cache in the background on the event loop and keep it
+        fresh
+
+        """
+
+        Engine.submit(cls.run())
@@ -0,0 +1,72 @@
+from typing import IO
+
+from cli.diffs import DiffGroups
+from cli.prettyprint import prettyprint_diff
+
+# Where the devices of a job result are found in the JSON data
+DEVICES_PREFIX = 'data.jobs.item.result.devices'
+
+
+def available() -> bool:
+    """
+    Find out if we can parse JSON incrementally, this needs the optional
+    ijson module.
+
+    """
+
+    try:
+        import ijson  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def load_job(fp: IO[bytes]) -> dict:
+    """
+    Parse a job from a file-like object, for example the raw body of a
+    response, without loading the whole result at once.
+
+    Every device in the job result is grouped as soon as it has been
+    parsed and is then thrown away. The devices dict of the result is
+    left empty and the groups are stored as 'device_groups' in the
+    result instead.
+
+    """
+
+    import ijson
+
+    builder = ijson.ObjectBuilder()
+    groups = DiffGroups(prettyprint_diff)
+    device = None
+    hostname = ''
+
+    for prefix, event, value in ijson.parse(fp, use_float=True):
+        if prefix != DEVICES_PREFIX:
+            if device is not None:
+                device.event(event, value)
+            else:
+                builder.event(event, value)
+            continue
+
+        # A new device, or the end of the devices, ends the last device
+        if device is not None and event in ['map_key', 'end_map']:
+            groups.add(hostname, device.value)
+            device = None
+
+        if event == 'map_key':
+            hostname = value
+            device = ijson.ObjectBuilder()
+        else:
+            builder.event(event, value)
+
+    data = builder.value
+
+    try:
+        result = data['data']['jobs'][0]['result']
+        if 'devices' in result:
+            result['device_groups'] = groups.groups
+    except (KeyError, IndexError, TypeError):
+        pass
+
+    return data
@@ -0,0 +1,168 @@
+import re
+from typing import Iterator
+
+# Modifiers which filter the output, each one is a generator which takes
+# lines as input and yields lines
+FILTERS = ['grep', 'exclude', 'head', 'count']
+
+# Modifiers which change how a command is executed or rendered
+OPTIONS = ['monitor', 'detailed', 'refresh']
+
+
+def parse_modifiers(modifier: str) -> list:
+    """
+    Parse a chain of modifiers, for example 'grep foo | head 5'.
+
+    Returns a list of tuples with modifier name and arguments.
+
+    """
+
+    modifiers = []
+
+    for part in modifier.split('|'):
+        words = part.strip().split(' ')
+        if words[0] == '':
+            continue
+        modifiers.append((words[0], ' '.join(words[1:])))
+
+    return modifiers
+
+
+def validate_modifiers(modifier: str) -> str:
+    """
+    Find out if all modifiers in a chain are known.
+
+    Returns an error message, or an empty string if all are valid.
+
+    """
+
+    for name, args in parse_modifiers(modifier):
+        if name not in FILTERS and name not in OPTIONS:
+            return 'Unknown modifier: %s' % name
+        if name == 'head' and args != '' and not args.isdigit():
+            return 'head expects a number of lines'
+        if name in ['grep', 'exclude']:
+            try:
+                parse_grep(args)
+            except re.error as e:
+                return 'Invalid regular expression: %s' % e
+
+    return ''
+
+
+def parse_grep(args: str) -> tuple:
+    """
+    Parse the arguments to grep and exclude. The options are:
+
+      -i      ignore case
+      -E      the pattern is a regular expression
+      -m <n>  stop after n matching lines
+
+    Returns a function which tells if a line matches and the maximum
+    number of matches, None if there is no limit.
+
+    """
+
+    limit = None
+    regex = False
+    flags = 0
+    words = args.split(' ')
+
+    while len(words) > 1 and words[0] in ['-i', '-E', '-m']:
+        option = words.pop(0)
+        if option == '-i':
+            flags = re.IGNORECASE
+        elif option == '-E':
+            regex = True
+        elif words[0].isdigit() and len(words) > 1:
+            limit = int(words.pop(0))
+        else:
+            words.insert(0, option)
+            break
+
+    pattern = ' '.join(words)
+
+    if regex:
+        match = re.compile(pattern, flags).search
+    elif flags:
+        match = re.compile(re.escape(pattern), flags).search
+    else:
+        def match(line):
+            return pattern in line
+
+    return match, limit
+
+
+def split_lines(chunks: Iterator[str]) -> Iterator[str]:
+    """
+    Split output, which is produced in chunks, into lines
+
+    """
+
+    buffer = ''
+
+    for chunk in chunks:
+        buffer += chunk
+        if '\n' not in chunk:
+            continue
+        *lines, buffer = buffer.split('\n')
+        yield from lines
+
+    if buffer != '':
+        yield buffer
+
+
+def grep(lines: Iterator[str], args: str,
+         invert: bool = False) -> Iterator[str]:
+    match, limit = parse_grep(args)
+    matches = 0
+
+    for line in lines:
+        if bool(match(line)) == invert:
+            continue
+        yield line
+        matches += 1
+        if matches == limit:
+            return
+
+
+def exclude(lines: Iterator[str], args: str) -> Iterator[str]:
+    return grep(lines, args, invert=True)
+
+
+def head(lines: Iterator[str], args: str) -> Iterator[str]:
+    limit = int(args) if args != '' else 10
+
+    if limit == 0:
+        return
+
+    for nr, line in enumerate(lines, start=1):
+        yield line
+        if nr == limit:
+            return
+
+
+def count(lines: Iterator[str], args: str) -> Iterator[str]:
+    yield '  %d' % sum(1 for line in lines)
+
+
+def apply_modifiers(chunks: Iterator[str], modifier: str) -> Iterator[str]:
+    """
+    Apply a chain of modifiers to output as it is produced. Each filter
+    only pulls as many lines as it needs, so 'head' and 'grep -m' stop
+    the rendering of the output early.
+
+    """
+
+    stages = {'grep': grep, 'exclude': exclude, 'head': head,
+              'count': count}
+    lines = split_lines(chunks)
+
+    for name, args in parse_modifiers(modifier):
+        if name in stages:
+            lines = stages[name](lines, args)
+
+    for line in lines:
+        yield line + '\n'
+
+    yield '\n'
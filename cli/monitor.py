@@ -0,0 +1,359 @@
+import asyncio
+import sys
+import time
+from typing import Optional
+
+from cli.engine import Engine
+from cli.fanout import is_fanout, show
+from cli.modifiers import apply_modifiers
+from cli.policy import describe
+from cli.prettyprint import iter_jobs_all, prettyprint
+from cli.rest import Rest
+from cli.terminal import terminal_size
+
+# A job in one of these states will not change any more
+JOB_DONE = ['FINISHED', 'ABORTED', 'EXCEPTION']
+
+
+def job_status(data: dict) -> Optional[str]:
+    """
+    Return the status of a job from the JSON data, None if the data does
+    not contain a single job.
+
+    """
+
+    try:
+        jobs = data['data']['jobs']
+    except (KeyError, TypeError):
+        return None
+
+    if len(jobs) != 1:
+        return None
+
+    return jobs[0]['status']
+
+
+class Screen():
+    """
+    Draw output on the terminal. Only lines that have changed since the
+    last time are redrawn.
+
+    """
+
+    def __init__(self) -> None:
+        self.lines: Optional[list] = None
+
+    def start(self) -> None:
+        # Clear the screen and disable line wrapping, so that every line
+        # is exactly one row on the terminal
+        sys.stdout.write('\033[2J\033[?7l')
+        sys.stdout.flush()
+
+    def stop(self) -> None:
+        sys.stdout.write('\033[?7h\n')
+        sys.stdout.flush()
+
+    def draw(self, lines: list, footer: str) -> None:
+        """
+        Draw lines and a footer below them
+
+        """
+
+        width, height = terminal_size()
+        old = self.lines if self.lines is not None else []
+        output = []
+
+        if len(lines) > height - 2:
+            hidden = len(lines) - height + 3
+            lines = lines[:height - 3]
+            lines.append('... %d more lines' % hidden)
+
+        for nr, line in enumerate(lines):
+            if nr < len(old) and old[nr] == line:
+                continue
+            output.append('\033[%d;1H\033[2K%s\033[0m' % (nr + 1, line))
+
+        for nr in range(len(lines), len(old) + 2):
+            output.append('\033[%d;1H\033[2K' % (nr + 1))
+
+        output.append('\033[%d;1H\033[2K%s' % (len(lines) + 2, footer))
+
+        self.lines = lines
+        sys.stdout.write(''.join(output))
+        sys.stdout.flush()
+
+
+class Monitor():
+    """
+    Monitor the output of a show command until it is aborted or, for a
+    job, until the job is done.
+
+    The command is polled with an adaptive interval, starting fast and
+    backing off while nothing changes. We use conditional requests when
+    the NMS supports it and compare the JSON data otherwise, the output is
+    only rendered and redrawn when the data has changed.
+
+    """
+
+    stopped = 'Job is not running, stopping monitor.'
+
+    def __init__(self, command: str, token: str, url: str,
+                 modifier: Optional[str] = '',
+                 min_interval: Optional[float] = 1.0,
+                 max_interval: Optional[float] = 30.0,
+                 backoff: Optional[float] = 1.5,
+                 error_interval: Optional[float] = 5.0) -> None:
+        self.command = command
+        self.token = token
+        self.url = url
+        self.modifier = modifier
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.error_interval = error_interval
+        self.interval = min_interval
+        self.validators: dict = dict()
+        self.data = None
+        self.screen = Screen()
+
+    def poll(self) -> bool:
+        """
+        Get the command from the NMS.
+
+        Returns True if the data has changed since the last poll.
+
+        """
+
+        # Output which is rendered while it is fetched is compared as text
+        if is_fanout(self.command):
+            data = show(self.command, self.token, self.url, self.modifier)[1]
+        elif Rest.is_listing('GET', self.command):
+            data = ''.join(Rest.listing(self.command, self.token, self.url,
+                                        self.modifier))
+        else:
+            data = None
+
+        if data is not None:
+            changed = data != self.data
+            self.data = data
+            return changed
+
+        res = Rest.get_response(self.command, self.token, self.url,
+                                headers=self.validators)
+
+        if res.status_code == 304:
+            return False
+
+        self.validators = dict()
+        if 'ETag' in res.headers:
+            self.validators['If-None-Match'] = res.headers['ETag']
+        if 'Last-Modified' in res.headers:
+            self.validators['If-Modified-Since'] = \
+                res.headers['Last-Modified']
+
+        data = res.json()
+        changed = data != self.data
+        self.data = data
+
+        # When showing the last job, stick to that job
+        status = job_status(data)
+        if status is not None and self.command.split(' ')[0] == 'job':
+            self.command = 'job %d' % data['data']['jobs'][0]['id']
+
+        return changed
+
+    def render(self) -> list:
+        """
+        Return the output as a list of lines
+
+        """
+
+        if isinstance(self.data, str):
+            output = self.data
+        else:
+            output = prettyprint(self.data, self.command.split(' ')[0],
+                                 modifier=self.modifier)
+
+        return output.rstrip('\n').split('\n')
+
+    def next_interval(self, changed: bool, failed: bool = False) -> float:
+        """
+        Poll fast when something happens and back off while nothing
+        changes. While polls fail we retry at most every error_interval
+        seconds, so that the output is updated soon after the NMS is back.
+
+        """
+
+        if changed:
+            self.interval = self.min_interval
+        elif failed:
+            self.interval = min(self.interval * self.backoff,
+                                self.error_interval)
+        else:
+            self.interval = min(self.interval * self.backoff,
+                                self.max_interval)
+
+        return self.interval
+
+    def done(self) -> bool:
+        """
+        Find out if there is nothing more to monitor
+
+        """
+
+        return job_status(self.data) in JOB_DONE
+
+    def update(self) -> Optional[float]:
+        """
+        Poll the command once and redraw the screen.
+
+        Returns the time to wait before the next poll, None when there is
+        nothing more to monitor.
+
+        """
+
+        try:
+            changed = self.poll()
+            error = ''
+        except Exception as e:
+            changed = False
+            error = 'Could not execute command: %s. ' % describe(e)
+
+        interval = self.next_interval(changed, error != '')
+
+        if error == '' and self.done():
+            self.screen.draw(self.render(), self.stopped)
+            return None
+
+        # Show the error even if nothing has been fetched yet
+        lines = self.render() if self.data is not None else []
+
+        self.screen.draw(lines, '%sLast update %s, next in %.0fs. Hit Ctrl+C '
+                         'to abort' % (error, time.strftime('%H:%M:%S'),
+                                       interval))
+
+        return interval
+
+    def run(self) -> None:
+        self.screen.start()
+
+        try:
+            while True:
+                interval = self.update()
+                if interval is None:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.screen.stop()
+
+
+class JobsMonitor(Monitor):
+    """
+    Monitor many jobs at once, for example 'show jobs status RUNNING'.
+
+    The jobs are listed once, after that each job which is not done is
+    polled concurrently. A job is dropped from the table as soon as it is
+    done and the monitor stops when all jobs are done.
+
+    """
+
+    stopped = 'No jobs running, stopping monitor.'
+
+    def __init__(self, command: str, token: str, url: str,
+                 modifier: Optional[str] = '',
+                 workers: Optional[int] = 10, **kwargs) -> None:
+        super().__init__(command, token, url, modifier, **kwargs)
+        self.workers = workers
+        self.jobs: dict = dict()
+        self.finished: dict = dict()
+
+    def list_jobs(self) -> list:
+        """
+        Return the jobs to monitor. Without a status we follow all jobs
+        which are scheduled or running.
+
+        """
+
+        if ' status ' in self.command + ' ':
+            commands = [self.command]
+        else:
+            commands = ['jobs status SCHEDULED', 'jobs status RUNNING']
+
+        jobs = []
+
+        for command in commands:
+            (url, args) = Rest.parse_args(command, self.url)
+            for data in Rest.pages(url, 'jobs', self.token, args,
+                                   Rest.per_page):
+                jobs += data['data']['jobs']
+
+        return jobs
+
+    async def get_job(self, job_id: int, limit: asyncio.Semaphore) -> \
+            Optional[dict]:
+        async with limit:
+            try:
+                return (await Rest.afetch('job %d' % job_id, self.token,
+                                          self.url))['data']['jobs'][0]
+            except Exception:
+                return None
+
+    async def get_jobs(self) -> list:
+        limit = asyncio.Semaphore(self.workers)
+        jobs = await asyncio.gather(*[self.get_job(x, limit)
+                                      for x in self.jobs])
+
+        return [job for job in jobs if job is not None]
+
+    def poll(self) -> bool:
+        if self.data is None:
+            jobs = self.list_jobs()
+        else:
+            jobs = Engine.run(self.get_jobs())
+
+        changed = self.data is None
+
+        for job in jobs:
+            if job['status'] in JOB_DONE:
+                self.jobs.pop(job['id'], None)
+                self.finished[job['id']] = job['status']
+                changed = True
+            elif self.jobs.get(job['id']) != job:
+                self.jobs[job['id']] = job
+                changed = True
+
+        self.data = sorted(self.jobs.values(), key=lambda job: job['id'])
+
+        return changed
+
+    def render(self) -> list:
+        jobs = {'data': {'jobs': list(self.data)}}
+        output = ''.join(apply_modifiers(iter_jobs_all(jobs, self.modifier,
+                                                       page=1),
+                                         self.modifier))
+        summary = '  %d active' % len(self.jobs)
+
+        for status in JOB_DONE:
+            summary += ', %d %s' % (list(self.finished.values()).count(status),
+                                    status.lower())
+
+        return output.rstrip('\n').split('\n') + ['', summary]
+
+    def done(self) -> bool:
+        return self.jobs == dict()
+
+
+def monitor(command: str, token: str, url: str,
+            modifier: Optional[str] = '',
+            workers: Optional[int] = 10) -> Monitor:
+    """
+    Return a monitor for a show command
+
+    """
+
+    if command.split(' ')[0] == 'jobs':
+        return JobsMonitor(command, token, url, modifier, workers=workers)
+
+    return Monitor(command, token, url, modifier)
@@ -0,0 +1,246 @@
+import os
+import re
+import select
+import sys
+import termios
+import tty
+from typing import Iterator, Optional
+
+from cli.modifiers import split_lines
+from cli.terminal import terminal_size
+
+# Escape sequences sent by special keys and what they do in the pager
+KEYS = {
+    '\033[A': 'k', '\033[B': 'j', '\033[5~': 'b', '\033[6~': ' ',
+    '\033[H': 'g', '\033[F': 'G', '\r': 'j', '\n': 'j', 'f': ' ',
+    '\x03': 'q', '\x04': ' ', '\x15': 'b'
+}
+
+# Used to remove colors before searching
+ANSI = re.compile(r'\033\[[0-9;?]*[A-Za-z]')
+
+
+class Pager():
+    """
+    A simple pager, similar to less. Lines are pulled from the output when
+    they are needed, so only what is shown on the screen has to be
+    rendered.
+
+    Keys:
+      space, f, PgDn  next page       b, PgUp        previous page
+      j, Enter, Down  next line       k, Up          previous line
+      g, Home         first line      G, End         last line
+      /<pattern>      search          n, N           next, previous match
+      q               quit
+
+    """
+
+    def __init__(self, chunks: Iterator[str], fd: Optional[int] = 0) -> None:
+        self.source = split_lines(chunks)
+        self.lines: list = []
+        self.done = False
+        self.top = 0
+        self.fd = fd
+        self.pattern = ''
+        self.last_match: Optional[int] = None
+        self.message = ''
+
+    def height(self) -> int:
+        """
+        Number of lines on a page, the last row is for the status line
+
+        """
+
+        return max(terminal_size()[1] - 1, 1)
+
+    def fill(self, count: int) -> bool:
+        """
+        Pull lines from the output until we have count lines.
+
+        Returns True if there are at least count lines.
+
+        """
+
+        while len(self.lines) < count and not self.done:
+            try:
+                self.lines.append(next(self.source))
+            except StopIteration:
+                self.done = True
+
+        return len(self.lines) >= count
+
+    def fits(self) -> bool:
+        """
+        Find out if the whole output fits on one page
+
+        """
+
+        return not self.fill(self.height() + 1)
+
+    def scroll(self, lines: int) -> None:
+        height = self.height()
+        self.fill(self.top + lines + height)
+        self.top = max(min(self.top + lines, len(self.lines) - height), 0)
+
+    def end(self) -> None:
+        while not self.done:
+            self.fill(len(self.lines) + 1000)
+        self.scroll(len(self.lines))
+
+    def search(self, backwards: Optional[bool] = False) -> None:
+        """
+        Move to the next line matching the pattern, lines are pulled
+        from the output until a match is found.
+
+        We continue from the last match while it is on the page. The page
+        can't scroll past the end, so near the end the last match is not
+        always the top line.
+
+        """
+
+        try:
+            match = re.compile(self.pattern).search
+        except re.error:
+            self.message = 'Invalid pattern'
+            return
+
+        if self.last_match is not None and \
+                self.top <= self.last_match < self.top + self.height():
+            nr = self.last_match
+        else:
+            nr = self.top
+
+        while True:
+            nr += -1 if backwards else 1
+            if nr < 0 or not self.fill(nr + 1):
+                self.message = 'Pattern not found'
+                return
+            if match(ANSI.sub('', self.lines[nr])):
+                break
+
+        self.last_match = nr
+        self.top = 0
+        self.scroll(nr)
+        if self.top != nr:
+            self.message = 'Match on line %d' % (nr + 1)
+
+    def draw(self) -> None:
+        height = self.height()
+        self.fill(self.top + height)
+        output = ['\033[H\033[2J']
+
+        for line in self.lines[self.top:self.top + height]:
+            output.append(line + '\033[0m\n')
+
+        output.append('\033[%d;1H' % (height + 1))
+
+        if self.message != '':
+            output.append('\033[7m%s\033[0m' % self.message)
+        elif self.done and self.top + height >= len(self.lines):
+            output.append('\033[7m(END)\033[0m')
+        else:
+            output.append(':')
+
+        self.message = ''
+        sys.stdout.write(''.join(output))
+        sys.stdout.flush()
+
+    def read_key(self) -> str:
+        key = os.read(self.fd, 1).decode('utf-8', 'replace')
+
+        # Special keys send an escape sequence
+        if key == '\033':
+            while select.select([self.fd], [], [], 0.05)[0]:
+                key += os.read(self.fd, 1).decode('utf-8', 'replace')
+                if key[-1].isalpha() or key[-1] == '~':
+                    break
+
+        return KEYS.get(key, key)
+
+    def read_pattern(self) -> Optional[str]:
+        """
+        Read a search pattern on the status line. Returns None if the
+        search was cancelled.
+
+        """
+
+        pattern = ''
+
+        while True:
+            sys.stdout.write('\033[%d;1H\033[2K/%s' %
+                             (self.height() + 1, pattern))
+            sys.stdout.flush()
+
+            key = os.read(self.fd, 1).decode('utf-8', 'replace')
+
+            if key in ['\r', '\n']:
+                return pattern
+            elif key in ['\033', '\x03']:
+                return None
+            elif key in ['\x7f', '\x08']:
+                pattern = pattern[:-1]
+            elif key.isprintable():
+                pattern += key
+
+    def run(self) -> None:
+        old_settings = termios.tcgetattr(self.fd)
+        sys.stdout.write('\033[?7l')
+
+        try:
+            tty.setcbreak(self.fd)
+
+            while True:
+                self.draw()
+                key = self.read_key()
+
+                if key == 'q':
+                    break
+                elif key == ' ':
+                    self.scroll(self.height())
+                elif key == 'b':
+                    self.scroll(-self.height())
+                elif key == 'j':
+                    self.scroll(1)
+                elif key == 'k':
+                    self.scroll(-1)
+                elif key == 'g':
+                    self.top = 0
+                elif key == 'G':
+                    self.end()
+                elif key == '/':
+                    pattern = self.read_pattern()
+                    if pattern:
+                        self.pattern = pattern
+                        self.last_match = None
+                        self.search()
+                elif key in ['n', 'N'] and self.pattern != '':
+                    self.search(backwards=key == 'N')
+        except KeyboardInterrupt:
+            pass
+        finally:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, old_settings)
+            sys.stdout.write('\033[%d;1H\033[2K\033[?7h' %
+                             (self.height() + 1))
+            sys.stdout.flush()
+
+
+def page(chunks: Iterator[str]) -> None:
+    """
+    Print output, use the pager if we are on a terminal and the output
+    does not fit on one page.
+
+    """
+
+    if not sys.stdin.isatty() or not sys.stdout.isatty():
+        for chunk in chunks:
+            print(chunk, end='', flush=True)
+        return
+
+    pager = Pager(chunks)
+
+    if pager.fits():
+        for line in pager.lines:
+            print(line)
+        return
+
+    pager.run()
@@ -1,6 +1,28 @@
-import yaml
+import hashlib
+import os
+import re
 
-from cli.cli_struct import f_cli
+from cli.cache import cache_read, cache_write
+
+# Bump this whenever the layout of the compiled specification changes
+SPEC_VERSION = 5
+
+_parsers: dict = dict()
+
+
+def get_parser(file: str) -> 'CliParser':
+    """
+    Return a shared CliParser for a specification file, so that the
+    specification is only loaded once per process.
+
+    """
+
+    path = os.path.abspath(file)
+
+    if path not in _parsers:
+        _parsers[path] = CliParser(file)
+
+    return _parsers[path]
 
 
 class CliParser():
@@ -12,7 +34,61 @@ class CliParser():
 
         """
 
-        self.__yaml_read(file)
+        self.plans: dict = dict()
+
+        if not self.__cache_read(file):
+            self.__yaml_read(file)
+            self.__cache_write(file)
+
+    def __cache_name(self, file) -> str:
+        """
+        Return the name of the cached specification for a file
+
+        """
+
+        path = os.path.abspath(file).encode()
+
+        return 'spec-%s.pickle' % hashlib.sha1(path).hexdigest()
+
+    def __cache_key(self, file) -> tuple:
+        """
+        Return the key the cached specification is valid for: format
+        version, modification time and hash of the YAML file
+
+        """
+
+        with open(file, 'rb') as fd:
+            digest = hashlib.sha256(fd.read()).hexdigest()
+
+        return (SPEC_VERSION, os.stat(file).st_mtime_ns, digest)
+
+    def __cache_read(self, file) -> bool:
+        """
+        Load the compiled specification from the cache, return False if
+        it is missing or outdated
+
+        """
+
+        cached = cache_read(self.__cache_name(file))
+
+        if not isinstance(cached, dict) or cached.get('key') != \
+           self.__cache_key(file):
+            return False
+
+        self.__load_index(cached['index'])
+
+        return True
+
+    def __cache_write(self, file) -> None:
+        """
+        Write the compiled specification to the cache
+
+        """
+
+        cache_write(self.__cache_name(file), {
+            'key': self.__cache_key(file),
+            'index': self.__dump_index()
+        })
 
     def __yaml_read(self, file) -> None:
         """
@@ -20,9 +96,103 @@ class CliParser():
 
         """
 
+        import yaml
+
+        from cli.cli_struct import f_cli
+
         with open(file, 'r') as fd:
-            self.json = yaml.safe_load(fd)
-        self.cli = f_cli(**self.json)
+            data = yaml.safe_load(fd)
+        self.__build_index(f_cli(**data))
+
+    def __build_index(self, cli) -> None:
+        """
+        Index commands and attributes by name so that lookups don't
+        have to scan the whole specification. The index only contains
+        plain dicts and lists so it can be cached.
+
+        """
+
+        self.commands: dict = dict()
+        self.attributes: dict = dict()
+
+        for cmd in cli.cli:
+            self.commands[cmd.command.name] = cmd.command
+            self.attributes[cmd.command.name] = dict()
+
+        for name, command in self.commands.items():
+            if command.attributes is not None:
+                for attr in command.attributes:
+                    self.attributes[name].setdefault(attr.name, attr.dict())
+            self.commands[name] = command.dict(exclude={'attributes'})
+
+        self.not_show = [x for x in self.commands
+                         if not self.commands[x]['show_only']]
+        self.delete = [x for x in self.commands
+                       if self.commands[x]['delete']]
+        self.show = [x for x in self.commands
+                     if not self.commands[x]['no_show']]
+        self.update = [x for x in self.commands
+                       if self.commands[x]['update']]
+
+    def __dump_index(self) -> dict:
+        return {
+            'commands': self.commands,
+            'attributes': self.attributes,
+            'not_show': self.not_show,
+            'delete': self.delete,
+            'show': self.show,
+            'update': self.update
+        }
+
+    def __load_index(self, index: dict) -> None:
+        self.commands = index['commands']
+        self.attributes = index['attributes']
+        self.not_show = index['not_show']
+        self.delete = index['delete']
+        self.show = index['show']
+        self.update = index['update']
+
+    def __attribute(self, command: str, attribute: str):
+        """
+        Return an attribute of a command, None if it doesn't exist
+
+        """
+
+        return self.attributes.get(command, {}).get(attribute)
+
+    def get_argument_plan(self, command: str) -> dict:
+        """
+        Return what is needed to parse the arguments of a command: the
+        URL, default values, which arguments are URL suffixes, filters or
+        fill a slot in the URL, and whether a lone number is an ID. The
+        plan is built the first time a command is parsed.
+
+        """
+
+        if command in self.plans:
+            return self.plans[command]
+
+        attributes = self.attributes.get(command, {})
+        url = self.get_url(command)
+        slots = dict()
+
+        for name in attributes:
+            pattern = re.compile(r'<%s?>' % name)
+            if pattern.search(url):
+                slots[name] = pattern
+
+        self.plans[command] = {
+            'url': url,
+            'defaults': self.get_attributes_default(command),
+            'suffixes': {x for x in attributes
+                         if attributes[x]['url_suffix']},
+            'filters': {x for x in attributes if attributes[x]['filter']},
+            'slots': slots,
+            'last_job': command == 'job',
+            'id_shortcut': 'job' in command or 'device' in command
+        }
+
+        return self.plans[command]
 
     def get_commands(self) -> list:
         """
@@ -30,7 +200,15 @@ class CliParser():
 
         """
 
-        return [x.command.name for x in self.cli.cli]
+        return list(self.commands)
+
+    def is_command(self, command: str) -> bool:
+        """
+        Return true if the command exists
+
+        """
+
+        return command in self.commands
 
     def get_command_description(self, command: str) -> str:
         """
@@ -38,64 +216,41 @@ class CliParser():
 
         """
 
-        try:
-            return [x.command.description for x in self.cli.cli if x.command.name
-                    == command][0]
-        except Exception:
+        if command not in self.commands:
             return ''
 
+        return self.commands[command]['description']
+
     def get_attributes(self, command: str) -> list:
         """
         Return attribute names for a command
 
         """
 
-        cmd_attrs = []
-
-        for cmd in self.cli.cli:
-            if cmd.command.name != command:
-                continue
-            if cmd.command.attributes is None:
-                return []
-            for attr in cmd.command.attributes:
-                cmd_attrs.append(attr.name)
-
-        return cmd_attrs
+        return list(self.attributes.get(command, {}))
 
     def get_mandatory(self, command: str, attribute: str) -> bool:
         """
         Return whether an attribute is mandatory or not
 
         """
-        for cmd in self.cli.cli:
-            if cmd.command.name != command:
-                continue
-            for attr in cmd.command.attributes:
-                if attr.name != attribute:
-                    continue
-                if attr.mandatory is True:
-                    return True
-                else:
-                    return False
-        return False
+
+        attr = self.__attribute(command, attribute)
+
+        if attr is None:
+            return False
+
+        return attr['mandatory'] is True
 
     def get_attributes_default(self, command: str) -> dict:
         """
         Return whether an attribute have an default value or not
 
         """
-        attributes: dict = dict()
 
-        for cmd in self.cli.cli:
-            if cmd.command.name != command:
-                continue
-            if cmd.command.attributes is None:
-                return attributes
-            for attr in cmd.command.attributes:
-                if attr.default is not None:
-                    attributes[attr.name] = attr.default
-
-        return attributes
+        return {x['name']: x['default'] for x in
+                self.attributes.get(command, {}).values()
+                if x['default'] is not None}
 
     def get_attribute_description(self, command: str, attribute: str) -> str:
         """
@@ -103,45 +258,20 @@ class CliParser():
 
         """
 
-        description: str = ''
+        attr = self.__attribute(command, attribute)
 
-        for cmd in self.cli.cli:
-            if cmd.command.name != command:
-                continue
-            for attr in cmd.command.attributes:
-                if attr.name != attribute:
-                    continue
-                description = attr.description
+        if attr is None:
+            return ''
 
-        return description
+        return attr['description']
 
     def get_attributes_show(self, command: str) -> list:
-        attributes: list = []
-
-        for cmd in self.cli.cli:
-            if cmd.command.name != command:
-                continue
-            if cmd.command.attributes is None:
-                return attributes
-            for attr in cmd.command.attributes:
-                if attr.show:
-                    attributes.append(attr.name)
-
-        return attributes
+        return [x['name'] for x in self.attributes.get(command, {}).values()
+                if x['show']]
 
     def get_attributes_no(self, command: str) -> list:
-        attributes: list = []
-
-        for cmd in self.cli.cli:
-            if cmd.command.name != command:
-                continue
-            if cmd.command.attributes is None:
-                return attributes
-            for attr in cmd.command.attributes:
-                if attr.delete:
-                    attributes.append(attr.name)
-
-        return attributes
+        return [x['name'] for x in self.attributes.get(command, {}).values()
+                if x['delete']]
 
     def get_url(self, command: str) -> str:
         """
@@ -149,14 +279,10 @@ class CliParser():
 
         """
 
-        url: str = ''
-
-        for cmd in self.cli.cli:
-            if cmd.command.name != command:
-                continue
-            url = cmd.command.url
+        if command not in self.commands:
+            return ''
 
-        return url
+        return self.commands[command]['url']
 
     def get_use_put(self, command: str) -> bool:
         """
@@ -164,60 +290,73 @@ class CliParser():
 
         """
 
-        for cmd in self.cli.cli:
-            if cmd.command.name != command:
-                continue
-            return cmd.command.use_put
+        if command not in self.commands:
+            return False
 
-        return False
+        return self.commands[command]['use_put']
 
-    def get_not_show(self) -> list:
+    def get_paginate(self, command: str) -> bool:
         """
-        Return true if this command is a show command only
+        Return true if the command returns a listing which should be
+        downloaded page by page
 
         """
-        commands: list = []
 
-        for cmd in self.cli.cli:
-            if not cmd.command.show_only:
-                commands.append(cmd.command.name)
+        if command not in self.commands:
+            return False
 
-        return commands
+        return self.commands[command]['paginate']
 
-    def get_delete(self) -> list:
-        commands: list = []
+    def get_cache_ttl(self, command: str) -> int:
+        """
+        Return for how many seconds a response may be cached, 0 if the
+        command should not be cached
+
+        """
+
+        if command not in self.commands:
+            return 0
+
+        return self.commands[command]['cache_ttl']
+
+    def get_projection(self, command: str) -> bool:
+        """
+        Return true if the NMS can be asked to only return some of the
+        fields of a listing
+
+        """
+
+        if command not in self.commands:
+            return False
+
+        return self.commands[command]['projection']
+
+    def get_not_show(self) -> list:
+        """
+        Return true if this command is a show command only
 
-        for cmd in self.cli.cli:
-            if cmd.command.delete:
-                commands.append(cmd.command.name)
+        """
+
+        return list(self.not_show)
 
-        return commands
+    def get_delete(self) -> list:
+        return list(self.delete)
 
     def get_show(self) -> list:
         """
         Return true if this command can do show
 
         """
-        commands: list = []
-
-        for cmd in self.cli.cli:
-            if not cmd.command.no_show:
-                commands.append(cmd.command.name)
 
-        return commands
+        return list(self.show)
 
     def get_update(self) -> list:
         """
         Return true if this command can be updated
 
         """
-        commands: list = []
 
-        for cmd in self.cli.cli:
-            if cmd.command.update:
-                commands.append(cmd.command.name)
-
-        return commands
+        return list(self.update)
 
     def get_url_suffix(self, command: str, attribute: str) -> bool:
         """
@@ -225,14 +364,23 @@ class CliParser():
 
         """
 
-        for cmd in self.cli.cli:
-            if cmd.command.name != command:
-                continue
-            if cmd.command.attributes is None:
-                return False
-            for attr in cmd.command.attributes:
-                if attr.name != attribute:
-                    continue
-                return attr.url_suffix
+        attr = self.__attribute(command, attribute)
+
+        if attr is None:
+            return False
+
+        return attr['url_suffix']
+
+    def get_filter(self, command: str, attribute: str) -> bool:
+        """
+        Find out if an argument should be sent as a filter in the query
+        string, for example filter[status]=RUNNING
+
+        """
+
+        attr = self.__attribute(command, attribute)
+
+        if attr is None:
+            return False
 
-        return False
+        return attr['filter']
@@ -0,0 +1,183 @@
+import json
+import os
+import random
+import time
+from typing import Optional
+
+# Responses telling us that the NMS, or a proxy in front of it, is down
+# or restarting. Other errors come from a working NMS.
+UNAVAILABLE = [502, 503, 504]
+
+
+class NMSError(Exception):
+    """
+    A request to the NMS failed, the message tells why
+
+    """
+
+    pass
+
+
+class NMSTimeout(NMSError):
+    pass
+
+
+class NMSUnreachable(NMSError):
+    pass
+
+
+class CircuitOpen(NMSError):
+    pass
+
+
+class RequestPolicy():
+    """
+    Timeouts and retries for requests to the NMS. A timeout of 0 means no
+    timeout.
+
+    Only GET requests are retried, they don't change anything on the NMS.
+    They are retried when the NMS can't be reached, times out or answers
+    that it is unavailable. The delay before each retry grows
+    exponentially and is randomized, so that many clients don't retry at
+    the same time.
+
+    """
+
+    connect_timeout: float = 10.0
+    read_timeout: float = 60.0
+    retries: int = 2
+    backoff: float = 0.5
+    max_backoff: float = 10.0
+
+    @classmethod
+    def configure(cls, connect_timeout: Optional[float] = 10.0,
+                  read_timeout: Optional[float] = 60.0,
+                  retries: Optional[int] = 2) -> None:
+        cls.connect_timeout = connect_timeout
+        cls.read_timeout = read_timeout
+        cls.retries = retries
+
+    @classmethod
+    def timeouts(cls) -> tuple:
+        """
+        Return the connect and read timeouts, None for no timeout
+
+        """
+
+        return (cls.connect_timeout or None, cls.read_timeout or None)
+
+    @classmethod
+    def attempts(cls, method: str) -> int:
+        return cls.retries + 1 if method == 'GET' else 1
+
+    @classmethod
+    def delay(cls, attempt: int) -> float:
+        """
+        Return how long to wait before retrying, attempt is 0 for the
+        first retry.
+
+        """
+
+        return random.uniform(0, min(cls.max_backoff,
+                                     cls.backoff * 2 ** attempt))
+
+
+class CircuitBreaker():
+    """
+    Stop sending requests for a while when the NMS is down, instead of
+    waiting for every request to time out.
+
+    The circuit opens after a number of requests in a row have failed.
+    While it is open requests fail at once. When the reset time has
+    passed one request is let through, if it succeeds the circuit is
+    closed again, otherwise it stays open for another period.
+
+    Requests are only made from the event loop, so no lock is needed.
+
+    """
+
+    threshold: int = 5
+    reset_after: float = 30.0
+    failures: int = 0
+    opened: Optional[float] = None
+    trial: bool = False
+    cause: str = ''
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.failures = 0
+        cls.opened = None
+        cls.trial = False
+        cls.cause = ''
+
+    @classmethod
+    def check(cls) -> None:
+        """
+        Raise CircuitOpen if no request should be sent now
+
+        """
+
+        if cls.opened is None:
+            return
+
+        remaining = cls.opened + cls.reset_after - time.monotonic()
+
+        # Let one request through, the next one waits another period
+        if remaining <= 0:
+            cls.opened = time.monotonic()
+            cls.trial = True
+            return
+
+        raise CircuitOpen('The NMS is not responding (%s), trying again in '
+                          '%.0fs' % (cls.cause, max(remaining, 1)))
+
+    @classmethod
+    def success(cls) -> None:
+        cls.reset()
+
+    @classmethod
+    def failure(cls, cause: str) -> None:
+        cls.failures += 1
+        cls.cause = cause
+
+        if cls.trial or cls.failures >= cls.threshold:
+            cls.opened = time.monotonic()
+            cls.trial = False
+
+
+def root_cause(error: BaseException) -> Optional[str]:
+    """
+    Return the operating system's description of the error behind an
+    exception from httpx or requests, for example 'Connection refused'.
+    They wrap the original error in one or more exceptions of their own.
+
+    """
+
+    seen = set()
+
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, OSError) and error.strerror:
+            # asyncio puts the address in strerror
+            if isinstance(error.errno, int) and error.errno > 0:
+                return os.strerror(error.errno)
+            return error.strerror
+        nested = [x for x in error.args if isinstance(x, BaseException)]
+        error = getattr(error, 'reason', None) or error.__cause__ or \
+            error.__context__ or (nested[0] if nested else None)
+
+    return None
+
+
+def describe(error: Exception) -> str:
+    """
+    Return a short description of why a command failed
+
+    """
+
+    if isinstance(error, json.JSONDecodeError):
+        return 'The NMS sent an invalid response'
+    if isinstance(error, (KeyError, IndexError, TypeError)):
+        return 'Unexpected response from the NMS'
+
+    return str(error) or type(error).__name__
@@ -1,43 +1,83 @@
-import sys
-import getopt
-import requests
-
-from typing import Optional
+from typing import Iterator, Optional
 
+from cli.diffs import group_diffs
+from cli.modifiers import apply_modifiers
 from cli.terminal import get_hline, lrstrip, terminal_size
+from cli.timing import Timing
+
+# Width and name of table columns, other columns are 15 characters wide
+# and named after the key.
+COLUMN_WIDTHS = {
+    'id': 5,
+    'management_ip': 16,
+    'model': 20,
+    'hostname': 20,
+    'last_seen': 30,
+    'os_version': 30,
+    'device_a_id': 20,
+    'device_b_id': 20
+}
+
+COLUMN_NAMES = {
+    'id': 'ID',
+    'management_ip': 'Management IP',
+    'model': 'Model',
+    'hostname': 'Hostname',
+    'last_seen': 'Last seen',
+    'os_version': 'OS version',
+    'device_a_id': 'Device a id',
+    'device_b_id': 'Device b id'
+}
+
+# Fields printed for a single device, after the device ID
+DEVICE_FIELDS = [
+    ('Hostname:', 'hostname'),
+    ('Site iD:', 'site_id'),
+    ('Description:', 'description'),
+    ('Managemnt IP:', 'management_ip'),
+    ('DHCP IP:', 'dhcp_ip'),
+    ('Infra IP:', 'infra_ip'),
+    ('OOP IP:', 'oob_ip'),
+    ('Serial:', 'serial'),
+    ('ZTP MAC:', 'ztp_mac'),
+    ('Platform:', 'platform'),
+    ('Vendor:', 'vendor'),
+    ('Model:', 'model'),
+    ('OS version:', 'os_version'),
+    ('Hostname:', 'hostname'),
+    ('Synchronized:', 'synchronized'),
+    ('State:', 'state'),
+    ('Device type:', 'device_type'),
+    ('Configuration hash:', 'confhash'),
+    ('Last seen:', 'last_seen'),
+    ('Port:', 'port')
+]
+
+# Fields left out of tables unless the output is detailed
+FORBIDDEN = {'confhash', 'oob_ip', 'infra_ip', 'port', 'dhcp_ip', 'ztp_mac',
+             'platform', 'serial', 'last_seen', 'esi_mac'}
+
+# Fields printed for each job in a listing
+JOB_FIELDS = ['id', 'status', 'start_time', 'finish_time', 'function_name',
+              'scheduled_by', 'exception']
+JOB_FIELDS_DETAILED = ['id', 'status', 'scheduled_time', 'start_time',
+                       'finish_time', 'function_name', 'scheduled_by',
+                       'comment', 'ticket_ref', 'next_job_id', 'next_job',
+                       'change_score', 'exception']
 
 
 def ids_to_hostnames() -> dict:
     """
-    Return a dict of IDs and hostnames.
+    Return a dict of IDs and hostnames, empty if the devices could not be
+    downloaded.
     """
 
-    devices: dict = {}
+    from cli.inventory import Inventory
 
     try:
-        opts, args = getopt.getopt(sys.argv[1:], 'u:t:')
-    except getopt.GetoptError:
-        return devices
-
-    for opt, arg in opts:
-        if opt == '-u':
-            url = arg
-        if opt == '-t':
-            token = arg
-    headers = {'Authorization': 'Bearer ' + token}
-    url = url + '/devices'
-
-    res = requests.get(url,
-                       headers=headers,
-                       verify=False)
-
-    if 'data' not in res.json():
-        return devices
-
-    for device in res.json()['data']['devices']:
-        devices[device['id']] = device['hostname']
-
-    return devices
+        return Inventory.hostnames()
+    except Exception:
+        return dict()
 
 
 def prettyprint_error(data: dict) -> str:
@@ -58,13 +98,35 @@ def prettyprint_error(data: dict) -> str:
     return '\n\033[91m%s\033[0m\n\n' % error
 
 
+def render_record(fields: list) -> str:
+    """
+    Render a record, one line for each field. Fields is a list of tuples
+    with format string, label and value.
+
+    """
+
+    return ''.join([fmt % (label, value) for fmt, label, value in fields])
+
+
+def render_header(key: str) -> str:
+    """
+    Render the header of a table column
+
+    """
+
+    if key in COLUMN_NAMES:
+        name = COLUMN_NAMES[key]
+    else:
+        name = key.replace('_', ' ').capitalize()
+
+    return ' %-*s |' % (COLUMN_WIDTHS.get(key, 15), name)
+
+
 def prettyprint_device(data: dict) -> str:
     """
     Prettyprint a single device.
     """
 
-    output = ''
-
     if 'devices' in data['data']:
         device_data = data['data']['devices'][0]
     elif 'updated_device' in data['data']:
@@ -76,33 +138,11 @@ def prettyprint_device(data: dict) -> str:
     else:
         'Could not parse response from API.'
 
-    output += '  %-30s %-30d\n' % ('ID:', device_data['id'])
-    output += '  %-30s %-30s\n' % ('Hostname:', device_data['hostname'])
-    output += '  %-30s %-30s\n' % ('Site iD:', device_data['site_id'])
-    output += '  %-30s %-30s\n' % ('Description:', device_data['description'])
-    output += '  %-30s %-30s\n' % ('Managemnt IP:',
-                                   device_data['management_ip'])
-    output += '  %-30s %-30s\n' % ('DHCP IP:', device_data['dhcp_ip'])
-    output += '  %-30s %-30s\n' % ('Infra IP:', device_data['infra_ip'])
-    output += '  %-30s %-30s\n' % ('OOP IP:', device_data['oob_ip'])
-    output += '  %-30s %-30s\n' % ('Serial:', device_data['serial'])
-    output += '  %-30s %-30s\n' % ('ZTP MAC:', device_data['ztp_mac'])
-    output += '  %-30s %-30s\n' % ('Platform:', device_data['platform'])
-    output += '  %-30s %-30s\n' % ('Vendor:', device_data['vendor'])
-    output += '  %-30s %-30s\n' % ('Model:', device_data['model'])
-    output += '  %-30s %-30s\n' % ('OS version:', device_data['os_version'])
-    output += '  %-30s %-30s\n' % ('Hostname:', device_data['hostname'])
-    output += '  %-30s %-30s\n' % ('Synchronized:',
-                                   device_data['synchronized'])
-    output += '  %-30s %-30s\n' % ('State:', device_data['state'])
-    output += '  %-30s %-30s\n' % ('Device type:', device_data['device_type'])
-    output += '  %-30s %-30s\n' % ('Configuration hash:',
-                                   device_data['confhash'])
-    output += '  %-30s %-30s\n' % ('Last seen:', device_data['last_seen'])
-    output += '  %-30s %-30s\n' % ('Port:', device_data['port'])
-    output += '\n'
+    fields = [('  %-30s %-30d\n', 'ID:', device_data['id'])]
+    fields += [('  %-30s %-30s\n', label, device_data[key]) for label, key
+               in DEVICE_FIELDS]
 
-    return output
+    return render_record(fields) + '\n'
 
 
 def prettyprint_job(data: dict, command: str) -> str:
@@ -125,63 +165,52 @@ def prettyprint_diff(diff: str) -> str:
 
     """
 
-    output = '\n'
+    output = ['\n']
     diff = diff.replace('\\n', '\n')
 
     for line in diff.split('\n'):
         if line.startswith('+'):
-            output += '\033[92m %s\n' % line
+            output.append('\033[92m %s\n' % line)
         elif line.startswith('@@'):
             continue
         elif line.startswith('-'):
-            output += '\033[91m %s\n' % line
+            output.append('\033[91m %s\n' % line)
         elif line.startswith('@'):
-            output += '\033[93m %s\n' % line
+            output.append('\033[93m %s\n' % line)
         else:
-            output += ' \033[0m%s\n' % line
+            output.append(' \033[0m%s\n' % line)
 
-    return output
+    return ''.join(output)
 
 
-def get_devices_data(data):
+def get_devices_data(data: dict, normalize: Optional[bool] = True) -> dict:
     """
-    Aggregate diffs and get list of hostnames
+    Aggregate diffs and get list of hostnames. Devices with the same diff
+    are grouped together, each unique diff is only rendered once.
+
+    If the job was parsed incrementally the devices are already grouped.
 
     """
 
-    devices = dict()
-    diff = ''
-    diffs = dict()
+    if 'device_groups' in data['result']:
+        return data['result']['device_groups']
 
-    devices = data['result']['devices']
+    return group_diffs(data['result']['devices'].items(), prettyprint_diff,
+                       normalize=normalize)
 
-    for device in devices:
-        hostname = device
-        failed = devices[device]['failed']
-        reason = None
 
-        for task in devices[device]['job_tasks']:
-            if task['failed']:
-                if task['result']:
-                    reason = task['result']
-            if task['diff'] is not None:
-                diff = prettyprint_diff(lrstrip(task['diff']))
+def prettyprint_devices(data: dict) -> str:
+    """
+    Format outpu from devices
 
-        if diff not in diffs:
-            diffs[diff] = {
-                'hostnames': [hostname],
-                'failed': failed,
-                'reason': reason
-            }
-        else:
-            diffs[diff]['hostnames'].append(hostname)
+    """
 
-    return diffs
+    return ''.join(iter_devices(data))
 
 
-def prettyprint_devices(data: dict) -> str:
+def iter_devices(data: dict) -> Iterator[str]:
     """
-    Format outpu from devices
+    Format output from devices, yields one group of devices at a time
 
     """
 
@@ -189,25 +218,22 @@ def prettyprint_devices(data: dict) -> str:
     first_job = data['data']['jobs'][0]
     finished = first_job['finished_devices']
 
-    output = '  Comment: %-20s\n' % first_job['comment']
-    output += '  Finished devices: %-20s\n' % ', '.join(finished)
+    yield '  Comment: %-20s\n' % first_job['comment']
+    yield '  Finished devices: %-20s\n' % ', '.join(finished)
+    hline = get_hline()
 
-    for diff in devices:
-        hostnames = devices[diff]['hostnames']
-        failed = devices[diff]['failed']
-        reason = devices[diff]['reason']
+    for group in devices.values():
+        reason = group['reason']
 
         if reason is not None:
             reason = '\033[91m %s\033[0m' % str(reason)
 
-        output += '\n' + get_hline()
-        output += '  Device(s): %s\n' % ', '.join(hostnames)
-        output += '  Failed: %s\n' % str(failed)
-        output += '  Reason: %s\n' % reason
-        output += '  Diff: \n'
-        output += diff
-
-    return output
+        yield ''.join(['\n' + hline,
+                       '  Device(s): %s\n' % ', '.join(group['hostnames']),
+                       '  Failed: %s\n' % str(group['failed']),
+                       '  Reason: %s\n' % reason,
+                       '  Diff: \n',
+                       group['diff']])
 
 
 def prettyprint_jobs_single(data: dict) -> str:
@@ -216,7 +242,16 @@ def prettyprint_jobs_single(data: dict) -> str:
 
     """
 
-    output = ''
+    return ''.join(iter_jobs_single(data))
+
+
+def iter_jobs_single(data: dict) -> Iterator[str]:
+    """
+    Prettyprinter for single job output, the devices of the job result
+    are yielded one group at a time.
+
+    """
+
     job_data = data['data']['jobs'][0]
     result = 'None'
     exception = 'None'
@@ -229,87 +264,90 @@ def prettyprint_jobs_single(data: dict) -> str:
         if 'message' in job_data['result']:
             result = job_data['result']['message']
 
-    output += '  %-30s %-50d\n' % ('ID:', job_data['id'])
-    output += '  %-30s %-50s\n' % ('Status:', job_data['status'])
-    output += '  %-30s %-50s\n' % ('Scheduled time:',
-                                   job_data['scheduled_time'])
-    output += '  %-30s %-50s\n' % ('Start time:', job_data['start_time'])
-    output += '  %-30s %-30s\n' % ('Finish time: ', job_data['finish_time'])
-    output += '  %-30s %-30s\n' % ('Scheduled by:', job_data['scheduled_by'])
-    output += '  %-30s %-30s\n' % ('Comment:', job_data['comment'])
-    output += '  %-30s %-30s\n' % ('Function name:', job_data['function_name'])
-    output += '  %-30s %-30s\n' % ('Next job ID:', job_data['next_job_id'])
-    output += '  %-30s %-30s\n' % ('Result:', lrstrip(result))
-    output += '  %-30s %-30s\n' % ('Exception:', lrstrip(exception))
+    yield render_record([
+        ('  %-30s %-50d\n', 'ID:', job_data['id']),
+        ('  %-30s %-50s\n', 'Status:', job_data['status']),
+        ('  %-30s %-50s\n', 'Scheduled time:', job_data['scheduled_time']),
+        ('  %-30s %-50s\n', 'Start time:', job_data['start_time']),
+        ('  %-30s %-30s\n', 'Finish time: ', job_data['finish_time']),
+        ('  %-30s %-30s\n', 'Scheduled by:', job_data['scheduled_by']),
+        ('  %-30s %-30s\n', 'Comment:', job_data['comment']),
+        ('  %-30s %-30s\n', 'Function name:', job_data['function_name']),
+        ('  %-30s %-30s\n', 'Next job ID:', job_data['next_job_id']),
+        ('  %-30s %-30s\n', 'Result:', lrstrip(result)),
+        ('  %-30s %-30s\n', 'Exception:', lrstrip(exception))
+    ])
 
     if job_data['result'] is not None and 'devices' in job_data['result']:
-        output += prettyprint_devices(data)
-
-    output += '\n'
+        yield from iter_devices(data)
 
-    return output
+    yield '\n'
 
 
-def prettyprint_jobs_all(data: dict, modifier: str) -> str:
+def prettyprint_jobs_all(data: dict, modifier: str,
+                         page: Optional[int] = 0) -> str:
     """
     Prettyprinter for all jobs output
 
+    """
+
+    return ''.join(iter_jobs_all(data, modifier, page))
+
+
+def iter_jobs_all(data: dict, modifier: str,
+                  page: Optional[int] = 0) -> Iterator[str]:
+    """
+    Prettyprinter for all jobs output, yields one line per job. If page is
+    set we only print one page of a listing, newest job first, and the
+    header is only printed for the first page.
+
     """
     if 'detailed' in modifier:
-        job_fields = ['id', 'status', 'scheduled_time', 'start_time',
-                      'finish_time', 'function_name', 'scheduled_by',
-                      'comment', 'ticket_ref', 'next_job_id', 'next_job',
-                      'change_score',
-                      'exception']
+        job_fields = JOB_FIELDS_DETAILED
     else:
-        job_fields = ['id', 'status', 'start_time', 'finish_time',
-                      'function_name', 'scheduled_by', 'exception']
+        job_fields = JOB_FIELDS
 
-    output = ''
+    header = []
+    fields = set(job_fields)
     jobs_data = data['data']['jobs']
-    error = None
-    jobs_data.reverse()
-
-    for field in job_fields:
-        if field == 'id':
-            output += ' %-10s | ' % 'ID'
-        elif field == 'status':
-            output += ' %-10s | ' % 'Status'
-        else:
-            field = field.replace('_', ' ')
-            output += ' %-30s | ' % field.capitalize()
 
-    output += '\n' + get_hline(newline=True)
+    if page == 0:
+        jobs_data.reverse()
+
+    if page <= 1:
+        for field in job_fields:
+            if field == 'id':
+                header.append(' %-10s | ' % 'ID')
+            elif field == 'status':
+                header.append(' %-10s | ' % 'Status')
+            else:
+                field = field.replace('_', ' ')
+                header.append(' %-30s | ' % field.capitalize())
+
+        yield ''.join(header) + '\n' + get_hline(newline=True)
 
     for job in jobs_data:
+        output = []
         for key in job:
-            if key == 'result':
-                if not job['result']:
-                    continue
-                if 'error' in job['result']:
-                    if type(job['result']) == str:
-                        error = job['result']
-                    else:
-                        error = job['result']['error']
-
             # Only print certain fields
-            if key not in job_fields:
+            if key not in fields:
                 continue
 
             # Don't print the backtrace
             if key == 'exception' and job['exception'] is not None:
-                output += ' %-30s | ' % job[key]['args'][0]
+                output.append(' %-30s | ' % job[key]['args'][0])
                 continue
 
             # Variable column width
             if key == 'id' or key == 'status':
-                output += ' %-10s | ' % job[key]
+                output.append(' %-10s | ' % job[key])
             else:
-                output += ' %-30s | ' % job[key]
-        output += '\n'
-    output += '\n'
+                output.append(' %-30s | ' % job[key])
+        output.append('\n')
+        yield ''.join(output)
 
-    return output
+    if page == 0:
+        yield '\n'
 
 
 def prettyprint_jobs(data: dict, command: str, modifier) -> str:
@@ -318,28 +356,71 @@ def prettyprint_jobs(data: dict, command: str, modifier) -> str:
 
     """
 
+    return ''.join(iter_jobs(data, command, modifier))
+
+
+def iter_jobs(data: dict, command: str, modifier) -> Iterator[str]:
+    """
+    Prettyprinter for jobs output, yields the output in chunks
+
+    """
+
     nr_jobs = len(data['data']['jobs'])
 
     if nr_jobs > 1:
-        return prettyprint_jobs_all(data, modifier)
+        return iter_jobs_all(data, modifier)
+
+    return iter_jobs_single(data)
+
+
+def projection(command: str, modifier: Optional[str] = '') -> \
+        Optional[list]:
+    """
+    Return the fields which are printed for each row of a listing, so
+    that we don't have to download the others. None if all fields are
+    printed.
 
-    return prettyprint_jobs_single(data)
+    Only jobs are printed with a fixed list of fields. Other tables print
+    every field except the forbidden ones, including fields we don't know
+    about.
+
+    """
+
+    if command == 'jobs':
+        return list(JOB_FIELDS_DETAILED if 'detailed' in modifier
+                    else JOB_FIELDS)
+
+    return None
 
 
 def prettyprint_command(data: dict, command: str,
-                        modifier: Optional[str] = None) -> str:
+                        modifier: Optional[str] = None,
+                        page: Optional[int] = 0) -> str:
     """
     Prettyprinter for commands
 
     """
 
-    forbidden = ['confhash', 'oob_ip', 'infra_ip', 'port', 'dhcp_ip',
-                 'ztp_mac', 'platform', 'serial', 'last_seen', 'esi_mac']
+    return ''.join(iter_command(data, command, modifier, page))
+
+
+def iter_command(data: dict, command: str,
+                 modifier: Optional[str] = None,
+                 page: Optional[int] = 0) -> Iterator[str]:
+    """
+    Prettyprinter for commands, yields one line per row. The header is a
+    union of the keys in all rows so that is collected first, the rows
+    are rendered when they are consumed.
+
+    If page is set we only print one page of a listing and the header is
+    only printed for the first page.
+
+    """
+
+    forbidden = FORBIDDEN
 
-    output = ''
     headers = []
-    values = ''
-    header_formatted = ''
+    formats = dict()
     id_mapping = None
 
     if command in data['data']:
@@ -348,65 +429,43 @@ def prettyprint_command(data: dict, command: str,
         content = data['data']
 
     if 'detailed' in modifier:
-        forbidden = []
+        forbidden = set()
 
     if command == 'linknets' or command == 'mgmtdomains':
         id_mapping = ids_to_hostnames()
     try:
         for row in content:
             for key in row:
-                if key in forbidden:
+                if key in forbidden or key in formats:
                     continue
-                if key not in headers:
-                    headers.append(key)
-                if key == 'id':
-                    values += ' %-5s |' % str(row[key])
-                elif key == 'management_ip':
-                    values += ' %-16s |' % str(row[key])
-                elif key == 'model':
-                    values += ' %-20s |' % str(row[key])
-                elif key == 'hostname':
-                    values += ' %-20s |' % str(row[key])
-                elif key == 'last_seen':
-                    values += ' %-30s |' % str(row[key])
-                elif key == 'os_version':
-                    values += ' %-30s |' % str(row[key])
-                elif key == 'device_a_id' or key == 'device_b_id':
-                    if command == 'linknets' or command == 'mgmtdomains':
-                        if row[key] in id_mapping:
-                            values += ' %-20s |' % str(id_mapping[row[key]])
-                else:
-                    values += ' %-15s |' % str(row[key])
-            values += '\n'
-
-        for header in headers:
-            if header == 'id':
-                header_formatted += ' %-5s |' % 'ID'
-            elif header == 'management_ip':
-                header_formatted += ' %-16s |' % 'Management IP'
-            elif header == 'model':
-                header_formatted += ' %-20s |' % 'Model'
-            elif header == 'hostname':
-                header_formatted += ' %-20s |' % 'Hostname'
-            elif header == 'last_seen':
-                header_formatted += ' %-30s |' % 'Last seen'
-            elif header == 'os_version':
-                header_formatted += ' %-30s |' % 'OS version'
-            elif header == 'device_a_id':
-                header_formatted += ' %-20s |' % 'Device a id'
-            elif header == 'device_b_id':
-                header_formatted += ' %-20s |' % 'Device b id'
-            else:
-                header = header.replace('_', ' ')
-                header_formatted += ' %-15s |' % str(header.capitalize())
+                headers.append(key)
+                formats[key] = ' %%-%ds |' % COLUMN_WIDTHS.get(key, 15)
+
+        header_formatted = ''.join([render_header(x) for x in headers])
     except Exception:
         print(data)
-        return('Failed to parse output\n')
+        yield 'Failed to parse output\n'
+        return
+
+    if page <= 1:
+        width, height = terminal_size()
+        yield header_formatted + '\n' + '-' * width + '\n'
 
-    values = values.replace('\\n', '\n')
-    width, height = terminal_size()
+    for row in content:
+        values = []
+        for key in row:
+            if key in forbidden:
+                continue
+            if key == 'device_a_id' or key == 'device_b_id':
+                if id_mapping is not None and row[key] in id_mapping:
+                    values.append(formats[key] % str(id_mapping[row[key]]))
+            else:
+                values.append(formats[key] % str(row[key]))
+        values.append('\n')
+        yield ''.join(values).replace('\\n', '\n')
 
-    return header_formatted + '\n' + '-' * width + '\n' + values + '\n'
+    if page == 0:
+        yield '\n'
 
 
 def prettyprint_other(data: dict) -> str:
@@ -426,15 +485,15 @@ def prettyprint_groups(data: dict, name: str) -> str:
     Prettyprint groups
     """
 
-    output = ''
+    output = []
 
     for item in data['data'][name]:
-        output += '  ' + item + ':\n'
+        output.append('  ' + item + ':\n')
         for line in data['data'][name][item]:
-            output += '    ' + line + '\n'
-        output += '\n'
+            output.append('    ' + line + '\n')
+        output.append('\n')
 
-    return output
+    return ''.join(output)
 
 
 def prettyprint_firmware(data: dict, name: str) -> str:
@@ -442,14 +501,9 @@ def prettyprint_firmware(data: dict, name: str) -> str:
     Prettyprint files
     """
 
-    output = ''
-
-    for item in data['data']['files']:
-        output += '  ' + item
-        output += '\n'
-    output += '\n'
+    output = ['  ' + item + '\n' for item in data['data']['files']]
 
-    return output
+    return ''.join(output) + '\n'
 
 
 def prettyprint_version(data: dict, name: str) -> str:
@@ -458,69 +512,69 @@ def prettyprint_version(data: dict, name: str) -> str:
 
     """
 
-    output = ''
+    output = ['  ' + item + ':\t' + data['data'][item] + '\n'
+              for item in data['data']]
 
-    for item in data['data']:
-        output += '  ' + item + ':\t' + data['data'][item] + '\n'
-    output += '\n'
-
-    return output
+    return ''.join(output) + '\n'
 
 
-def prettyprint_modifier(lines, modifier):
+def prettyprint_page(data: dict, command: str, modifier: str,
+                     page: int) -> Iterator[str]:
     """
-    Handle modifiers, grep etc
+    Prettyprint one page of a paginated listing
 
     """
 
-    output = ''
-    command = lrstrip(modifier).split(' ')[0]
-    args = ' '.join(lrstrip(modifier).split(' ')[1:])
-
-    if lrstrip(command) == 'grep':
-        for line in lines.split('\n'):
-            if args not in line:
-                continue
-            output += line + '\n'
-    else:
-        output = lines
-
-    output += '\n'
+    if 'data' in data and 'jobs' in data['data']:
+        return iter_jobs_all(data, modifier, page=page)
 
-    return output
+    return iter_command(data, command, modifier, page=page)
 
 
-def prettyprint(data: dict, command: str, modifier: Optional[str] = '') -> str:
+def prettyprint_stream(data: dict, command: str,
+                       modifier: Optional[str] = '') -> Iterator[str]:
     """
-    Prettyprint the JSON data we get back from the API
+    Prettyprint the JSON data we get back from the API and yield the
+    output in chunks. Tables are rendered row by row when the output is
+    consumed, so modifiers like 'head' stop the rendering early.
 
     """
-    output = ''
 
     # A few commands need a little special treatment
     if command == 'job':
         command = 'jobs'
 
     if 'data' in data and 'jobs' in data['data']:
-        output = prettyprint_jobs(data, command, modifier)
+        output = iter_jobs(data, command, modifier)
     elif 'data' in data and 'files' in data['data']:
-        output = prettyprint_firmware(data, command)
+        output = iter([prettyprint_firmware(data, command)])
     elif 'job_id' in data:
-        output = prettyprint_job(data, command)
+        output = iter([prettyprint_job(data, command) or ''])
     elif 'data' in data and 'groups' in data['data']:
-        output = prettyprint_groups(data, 'groups')
+        output = iter([prettyprint_groups(data, 'groups')])
     elif 'data' in data and 'version' in data['data']:
-        output = prettyprint_version(data, 'version')
+        output = iter([prettyprint_version(data, 'version')])
     elif 'data' in data and command == 'device':
-        output = prettyprint_device(data)
+        output = iter([prettyprint_device(data)])
     elif 'data' in data and command in data['data']:
-        output = prettyprint_command(data, command, modifier)
+        output = iter_command(data, command, modifier)
     elif 'status' in data and data['status'] == 'error':
-        output = prettyprint_error(data)
+        output = iter([prettyprint_error(data)])
     else:
-        output = prettyprint_other(data)
+        output = iter([prettyprint_other(data)])
+
+    output = Timing.iterate('render', output)
 
     if modifier != '':
-        output = prettyprint_modifier(output, modifier)
+        output = Timing.iterate('filter', apply_modifiers(output, modifier))
 
     return output
+
+
+def prettyprint(data: dict, command: str, modifier: Optional[str] = '') -> str:
+    """
+    Prettyprint the JSON data we get back from the API
+
+    """
+
+    return ''.join(prettyprint_stream(data, command, modifier))
@@ -1,24 +1,63 @@
+import asyncio
 import re
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
-import requests
-from urllib3.exceptions import InsecureRequestWarning
+from cli import jsonstream
+from cli.engine import Engine, Response
+from cli.httpcache import ResponseCache
+from cli.modifiers import apply_modifiers, parse_modifiers
+from cli.parser import CliParser, get_parser
+from cli.policy import describe
+from cli.prettyprint import (prettyprint, prettyprint_page,
+                             prettyprint_stream, projection)
+from cli.timing import Timing
 
-from cli.parser import CliParser
-from cli.prettyprint import prettyprint
 
-requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+# A lone number after a job or device command is an ID
+NUMBER = re.compile(r'[0-9]+')
+
+# Query parameter selecting the fields the NMS returns in a listing
+FIELDS = 'fields'
 
 
 class Rest():
-    cli = CliParser('cnaas.yml')
+    cli: Optional[CliParser] = None
+    hooks: list = []
+    per_page: int = 100
+
+    @classmethod
+    def add_hook(cls, hook: Callable) -> None:
+        """
+        Add a function which is called as hook(method, command, data)
+        after every successful call to the NMS.
+
+        """
+
+        cls.hooks.append(hook)
 
     @classmethod
+    def parser(cls) -> CliParser:
+        """
+        Return the command specification. CliHandler shares its parser
+        with us, otherwise we load the default specification.
+
+        """
+
+        if cls.cli is None:
+            cls.cli = get_parser('cnaas.yml')
+
+        return cls.cli
+
+    @classmethod
+    @Timing.timed('parse')
     def parse_args(cls, line: str, url: Optional[str] = '') -> tuple:
         """
         Parse arguments from command. Strip the first word, which is the
         command itself and then build a dict with arguments.
 
+        Everything we need to know about the command is looked up once
+        in its argument plan, the arguments are then parsed in one pass.
+
         """
 
         idx = 0
@@ -26,118 +65,414 @@ class Rest():
 
         args = line.rstrip().split(' ')[1:]
         command = line.split(' ')[0]
-        url = url + cls.cli.get_url(command)
-        default_args = cls.cli.get_attributes_default(command)
+
+        with Timing.phase('spec'):
+            plan = cls.parser().get_argument_plan(command)
+
+        url = url + plan['url']
+        default_args = plan['defaults']
 
         # If we have a job command and an empty list of arguments, set
         # the job ID to last. By doing this we will get the last job.
         #
         # Also, if we only and an ID, insert the argument keyword 'id'
         # before it to build a correct set of arguments.
-        if command == 'job' and args == []:
+        if plan['last_job'] and args == []:
             args = ['id', 'last']
-        elif re.findall(r'(job|device)', command):
-            if len(args) == 1 and re.match(r'[0-9]+', args[0]):
-                num_arg = args[0]
-                args = ['id', num_arg]
+        elif plan['id_shortcut']:
+            if len(args) == 1 and NUMBER.match(args[0]):
+                args = ['id', args[0]]
 
         # Check if we have duplicated arguments, we shouldn't handle that.
         duplicates = set()
         for i in args:
             if i not in duplicates:
                 duplicates.add(i)
-            else:
-                if i.lower() != 'true' and i.lower() != 'false':
-                    return('error', 'Duplicated arguments (%s), aborting.' % i)
+            elif i.lower() != 'true' and i.lower() != 'false':
+                return('error', 'Duplicated arguments (%s), aborting.' % i)
 
-        # We also have to figure out if we have arguments without
-        # values, then we should get the default value from the
-        # specification and use that.
         while idx < len(args):
             arg = args[idx]
-
-            try:
-                if arg in default_args:
-                    if args[idx + 1] in default_args:
-                        args_dict[arg] = default_args[arg]
-                        idx = idx + 1
-                    else:
-                        next_arg = args[idx + 1].lower()
-                        if next_arg != 'true' and next_arg != 'false':
-                            args_dict[arg] = default_args[arg]
-                            idx = idx + 1
-                        else:
-                            args_dict[arg] = next_arg
-                            idx = idx + 2
+            next_arg = args[idx + 1] if idx + 1 < len(args) else None
+
+            # Arguments without values get the default value from the
+            # specification, unless they are followed by true or false.
+            if arg in default_args:
+                if next_arg is None or next_arg in default_args or \
+                   next_arg.lower() not in ['true', 'false']:
+                    value = default_args[arg]
+                    idx = idx + 1
                 else:
-                    args_dict[arg] = args[idx + 1]
+                    value = next_arg.lower()
                     idx = idx + 2
-            except IndexError:
-                if arg in default_args:
-                    args_dict[arg] = default_args[arg]
-                    idx = idx + 1
-
-        # Sometimes we want to add something to the end of an URL, for
-        # example if we have the argument 'last' for a job, we should
-        # append something to the URL.
-        for key in args_dict:
-            pattern = re.compile(r'<%s?>' % key)
-
-            if args_dict[key] == 'true':
-                args_dict[key] = True
-            if args_dict[key] == 'false':
-                args_dict[key] = False
-
-            if cls.cli.get_url_suffix(command, key):
-                if any(args_dict[key] == x for x in ['last', '-1', '0']):
-                    args_dict[key] = 's?sort=-id&per_page=1&page=1'
-                    url += str(args_dict[key])
+            elif next_arg is None:
+                return ('error', 'Missing value for argument (%s), '
+                        'aborting.' % arg)
+            else:
+                value = next_arg
+                idx = idx + 2
+
+            if value == 'true':
+                value = True
+            if value == 'false':
+                value = False
+
+            # Sometimes we want to add something to the end of an URL,
+            # for example if we have the argument 'last' for a job, we
+            # should append something to the URL.
+            if arg in plan['suffixes']:
+                if any(value == x for x in ['last', '-1', '0']):
+                    value = 's?sort=-id&per_page=1&page=1'
+                    url += value
 
                     print('Showing the last job...\n')
                 else:
-                    url += '/' + str(args_dict[key])
-            elif pattern.search(url):
-                url = pattern.sub(str(args_dict[key]), url)
-            else:
-                args_dict[key] = args_dict[key]
+                    url += '/' + str(value)
+            elif arg in plan['filters']:
+                # Filters are part of the URL and not sent as arguments
+                url += '&' if '?' in url else '?'
+                url += 'filter[%s]=%s' % (arg, value)
+                continue
+            elif arg in plan['slots']:
+                url = plan['slots'][arg].sub(str(value), url)
+
+            args_dict[arg] = value
 
         return (url, args_dict)
 
     @classmethod
-    def rest_call(cls, method: str, command: str, token: str, url: str,
-                  modifier: Optional[str] = '') -> str:
+    def respond(cls, method: str, command: str, token: str, url: str,
+                modifier: Optional[str] = '') -> tuple:
+        """
+        Call the NMS.
+
+        Returns a tuple with a boolean telling whether the call was
+        successful or not and an iterator over the prettyprinted output,
+        which is rendered as it is consumed.
+
+        """
 
         (url, args) = cls.parse_args(command, url)
 
         if url == 'error':
-            return args
+            return (False, iter([args]))
 
         command = command.split(' ')[0]
         headers = {'Authorization': 'Bearer ' + token}
 
+        if method not in ['GET', 'POST', 'PUT', 'DELETE']:
+            return (False, iter(['Unknown REST method!']))
+
+        # Use a cached response if it is fresh, otherwise ask the NMS if
+        # it is still valid
+        ttl = cls.parser().get_cache_ttl(command) if method == 'GET' else 0
+        cached = None
+
+        if ttl > 0 and ResponseCache.enabled:
+            cached = ResponseCache.lookup(url, args)
+
+            if cached is not None and \
+               'refresh' in [x[0] for x in parse_modifiers(modifier)]:
+                cached = None
+            elif cached is not None and ResponseCache.is_fresh(cached, ttl):
+                return (True, prettyprint_stream(cached['data'], command,
+                                                 modifier=modifier))
+            elif cached is not None:
+                headers.update(ResponseCache.validators(cached))
+
+        # Job results can be huge, parse them incrementally if we can
+        incremental = method == 'GET' and command == 'job' and \
+            jsonstream.available()
+
         try:
-            if method == 'GET':
-                res = requests.get(url, headers=headers, json=args,
-                                   verify=False)
-            elif method == 'POST':
-                res = requests.post(url, headers=headers, json=args,
-                                    verify=False)
-            elif method == 'PUT':
-                res = requests.put(url, headers=headers, json=args,
-                                   verify=False)
-            elif method == 'DELETE':
-                res = requests.delete(url, headers=headers, json=args,
-                                      verify=False)
-            else:
-                return 'Unknown REST method!'
+            with Timing.phase(None) as request:
+                res = Engine.send(method, url, headers=headers, json=args,
+                                  stream=incremental)
+            Timing.response(request, res)
+
+            if res.status_code == 304 and cached is not None:
+                ResponseCache.touch(url, args)
+                return (True, prettyprint_stream(cached['data'], command,
+                                                 modifier=modifier))
 
+            # Errors from a proxy in front of the NMS are not JSON
             if res.status_code != 200:
-                return prettyprint(res.json(), command)
+                try:
+                    data = res.json()
+                except ValueError:
+                    res.raise_for_status()
+                    raise
+                return (False, iter([prettyprint(data, command)]))
+
+            # When the job is parsed incrementally the rest of the
+            # transfer is included in decode
+            with Timing.phase('decode'):
+                if incremental:
+                    data = jsonstream.load_job(res.raw)
+                else:
+                    data = res.json()
+        except Exception as e:
+            return (False, iter(['Could not execute command: %s\n\n' %
+                                 describe(e)]))
+
+        success = 'status' not in data or data['status'] != 'error'
+
+        if success and ttl > 0 and ResponseCache.enabled:
+            ResponseCache.store(cls.parser().get_url(command), url, args,
+                                data, res.headers)
+        elif success and method != 'GET' and ResponseCache.enabled:
+            ResponseCache.invalidate(cls.parser().get_url(command))
+
+        if success:
+            for hook in cls.hooks:
+                hook(method, command, data)
+
+        return (success, prettyprint_stream(data, command,
+                                            modifier=modifier))
+
+    @classmethod
+    def request(cls, method: str, command: str, token: str, url: str,
+                modifier: Optional[str] = '') -> tuple:
+        """
+        Call the NMS and prettyprint the response.
+
+        Returns a tuple with a boolean telling whether the call was
+        successful or not and the output.
+
+        """
+
+        if cls.is_listing(method, command):
+            try:
+                return (True, ''.join(cls.listing(command, token, url,
+                                                  modifier)))
+            except Exception as e:
+                return (False, 'Could not execute command: %s\n\n' %
+                        describe(e))
+
+        (success, output) = cls.respond(method, command, token, url,
+                                        modifier)
+
+        return (success, ''.join(output))
+
+    @classmethod
+    async def aget(cls, url: str, token: str, args: Optional[dict] = None,
+                   headers: Optional[dict] = None) -> Response:
+        """
+        GET an URL from the NMS on the event loop and return the response.
+        Extra headers, for example for conditional requests, can be added.
+        Raises an exception on failure.
+
+        """
+
+        request_headers = {'Authorization': 'Bearer ' + token}
+
+        if headers is not None:
+            request_headers.update(headers)
+
+        res = await Engine.request('GET', url, headers=request_headers,
+                                   json=args)
+
+        if res.status_code != 304:
+            res.raise_for_status()
+
+        return res
+
+    @classmethod
+    def get_response(cls, command: str, token: str, url: str,
+                     headers: Optional[dict] = None) -> Response:
+        """
+        GET a command from the NMS and return the response, see aget.
+
+        """
+
+        (url, args) = cls.parse_args(command, url)
+
+        if url == 'error':
+            raise ValueError(args)
 
-        except Exception:
-            return 'Could not execute command\n\n'
+        return Engine.run(cls.aget(url, token, args, headers))
+
+    @classmethod
+    async def afetch(cls, command: str, token: str, url: str) -> dict:
+        """
+        GET a command from the NMS on the event loop and return the
+        decoded JSON data. Raises an exception on failure.
+
+        """
+
+        (url, args) = cls.parse_args(command, url)
+
+        if url == 'error':
+            raise ValueError(args)
+
+        return (await cls.aget(url, token, args)).json()
+
+    @classmethod
+    def fetch(cls, command: str, token: str, url: str) -> dict:
+        """
+        GET a command from the NMS and return the decoded JSON data
+        without prettyprinting it. Raises an exception on failure.
+
+        """
+
+        return cls.get_response(command, token, url).json()
+
+    @classmethod
+    def pages(cls, url: str, name: str, token: str,
+              args: Optional[dict] = None,
+              per_page: Optional[int] = 100) -> Iterator[dict]:
+        """
+        GET a listing page by page. Yields the decoded JSON data for each
+        page, the next page is not requested until it is needed.
+
+        """
+
+        page = 1
+        count = 0
+        headers = {'Authorization': 'Bearer ' + token}
+        separator = '&' if '?' in url else '?'
+
+        while True:
+            with Timing.phase(None) as request:
+                res = Engine.send('GET', '%s%spage=%d&per_page=%d' %
+                                  (url, separator, page, per_page),
+                                  headers=headers, json=args)
+            Timing.response(request, res)
+            res.raise_for_status()
+
+            with Timing.phase('decode'):
+                data = res.json()
+            rows = len(data['data'][name])
+            count += rows
+
+            yield data
+
+            total = int(res.headers.get('X-Total-Count', -1))
+            if rows == 0 or count == total:
+                break
+            if total == -1 and rows < per_page:
+                break
+            page += 1
+
+    @classmethod
+    async def afetch_all(cls, path: str, name: str, token: str, url: str,
+                         per_page: Optional[int] = 1000) -> list:
+        """
+        GET all pages of a listing on the event loop, for example all
+        devices, and return a list with the items. When the NMS tells us
+        how many items there are, the pages after the first one are
+        downloaded concurrently.
+
+        """
+
+        url += path
+        separator = '&' if '?' in url else '?'
+
+        def page_url(page):
+            return '%s%spage=%d&per_page=%d' % (url, separator, page, per_page)
+
+        res = await cls.aget(page_url(1), token)
+        items = res.json()['data'][name]
+        total = int(res.headers.get('X-Total-Count', -1))
+
+        if total != -1:
+            pages = await asyncio.gather(*[
+                cls.aget(page_url(page), token)
+                for page in range(2, (total - 1) // per_page + 2)])
+            for res in pages:
+                items += res.json()['data'][name]
+            return items
+
+        # Without a total we get one page at a time until a page isn't full
+        rows = items
+        page = 1
+
+        while len(rows) == per_page:
+            page += 1
+            rows = (await cls.aget(page_url(page), token)).json()['data'][name]
+            items += rows
+
+        return items
+
+    @classmethod
+    def fetch_all(cls, path: str, name: str, token: str, url: str,
+                  per_page: Optional[int] = 1000) -> list:
+        """
+        GET all pages of a listing, for example all devices, and return a
+        list with the items.
+
+        """
+
+        return Engine.run(cls.afetch_all(path, name, token, url, per_page))
+
+    @classmethod
+    def listing(cls, command: str, token: str, url: str,
+                modifier: Optional[str] = '') -> Iterator[str]:
+        """
+        GET a paginated listing and yield the prettyprinted output of each
+        page as soon as it has arrived. Raises an exception on failure.
+
+        """
+
+        (url, args) = cls.parse_args(command, url)
+
+        if url == 'error':
+            raise ValueError(args)
+
+        command = command.split(' ')[0]
+        fields = projection(command, modifier)
+
+        # Only ask for the fields we are going to print
+        if fields is not None and cls.parser().get_projection(command):
+            url += '&' if '?' in url else '?'
+            url += '%s=%s' % (FIELDS, ','.join(fields))
+
+        pages = cls.pages(url, command, token, args, cls.per_page)
+
+        def output():
+            for page, data in enumerate(pages, start=1):
+                yield from Timing.iterate('render', prettyprint_page(
+                    data, command, modifier, page))
+            yield '\n'
+
+        if modifier == '':
+            return output()
+
+        return Timing.iterate('filter', apply_modifiers(output(), modifier))
+
+    @classmethod
+    def is_listing(cls, method: str, command: str) -> bool:
+        """
+        Find out if a command returns a paginated listing
+
+        """
+
+        return method == 'GET' and \
+            cls.parser().get_paginate(command.split(' ')[0])
+
+    @classmethod
+    def stream(cls, method: str, command: str, token: str, url: str,
+               modifier: Optional[str] = '') -> Iterator[str]:
+        """
+        Call the NMS and yield the prettyprinted output in chunks.
+        Paginated listings are downloaded and printed page by page.
+
+        """
+
+        if not cls.is_listing(method, command):
+            yield from cls.respond(method, command, token, url, modifier)[1]
+            return
+
+        try:
+            yield from cls.listing(command, token, url, modifier)
+        except Exception as e:
+            yield 'Could not execute command: %s\n\n' % describe(e)
+
+    @classmethod
+    def rest_call(cls, method: str, command: str, token: str, url: str,
+                  modifier: Optional[str] = '') -> str:
 
-        return prettyprint(res.json(), command, modifier=modifier)
+        return cls.request(method, command, token, url, modifier)[1]
 
     @classmethod
     def get(cls, command: str, token: str, url: str,
@@ -0,0 +1,73 @@
+from typing import Optional
+
+# requests is slow to import, so it is imported when the first session is
+# created instead of when the CLI starts.
+_session = None
+_pool_size: int = 10
+
+
+def new_session(pool_size: Optional[int] = 10) -> None:
+    """
+    Start a new HTTP session. Any previous session is closed and the
+    connection pool is created on first use.
+
+    """
+
+    global _pool_size
+
+    close_session()
+    _pool_size = pool_size
+
+
+def pool_size() -> int:
+    return _pool_size
+
+
+def get_session():
+    """
+    Return the current HTTP session. REST calls go through this session
+    when httpx is not installed, so that connections are kept alive and
+    reused.
+
+    """
+
+    global _session
+
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.exceptions import InsecureRequestWarning
+
+        from cli.timing import connection_classes
+
+        requests.packages.urllib3.disable_warnings(
+            category=InsecureRequestWarning)
+
+        adapter = HTTPAdapter(pool_connections=_pool_size,
+                              pool_maxsize=_pool_size)
+        (http_pool, https_pool) = connection_classes()
+        adapter.poolmanager.pool_classes_by_scheme = {'http': http_pool,
+                                                      'https': https_pool}
+        _session = requests.Session()
+        _session.verify = False
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+
+    return _session
+
+
+def close_session() -> None:
+    """
+    Close the current HTTP session and all pooled connections.
+
+    """
+
+    global _session
+
+    from cli.engine import Engine
+
+    Engine.close()
+
+    if _session is not None:
+        _session.close()
+        _session = None
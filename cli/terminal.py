@@ -1,4 +1,5 @@
 import fcntl
+import shutil
 import struct
 import termios
 from typing import Optional
@@ -42,8 +43,15 @@ def terminal_size() -> tuple:
     """
 
     packed_struct = struct.pack('HHHH', 0, 0, 0, 0)
-    h, w, hp, wp = struct.unpack('HHHH', fcntl.ioctl(0, termios.TIOCGWINSZ,
-                                                     packed_struct))
+
+    # Standard in is not a terminal when running in batch mode
+    try:
+        h, w, hp, wp = struct.unpack('HHHH',
+                                     fcntl.ioctl(0, termios.TIOCGWINSZ,
+                                                 packed_struct))
+    except OSError:
+        w, h = shutil.get_terminal_size()
+
     return w, h
 
 
@@ -0,0 +1,427 @@
+import atexit
+import cProfile
+import functools
+import json
+import sys
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+# Phases of a command in the order they happen. Connect includes the DNS
+# lookup, urllib3 resolves the name while it connects. TTFB is the time
+# from sending the request until the NMS starts to answer.
+PHASES = ['spec', 'parse', 'connect', 'tls', 'ttfb', 'transfer', 'decode',
+          'render', 'filter']
+
+# Phases spent waiting for the NMS and on the network, everything else is
+# spent in the CLI
+NMS = ['ttfb']
+NETWORK = ['connect', 'tls', 'transfer']
+
+
+class Phase():
+    """
+    Measure a phase of a command. Time spent in phases measured inside this
+    one is not counted twice, it is only added to the inner phase.
+
+    """
+
+    def __init__(self, name: Optional[str]) -> None:
+        self.name = name
+        self.elapsed = 0.0
+        self.nested = 0.0
+
+    def __enter__(self) -> 'Phase':
+        self.outer = getattr(Timing.local, 'nested', 0.0)
+        Timing.local.nested = 0.0
+        self.started = time.perf_counter()
+
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.elapsed = time.perf_counter() - self.started
+        self.nested = Timing.local.nested
+        Timing.local.nested = self.outer + self.elapsed
+
+        if self.name is not None:
+            Timing.add(self.name, self.elapsed - self.nested)
+
+        return False
+
+
+class Untimed():
+    """
+    Used instead of a phase when timing is off
+
+    """
+
+    elapsed = 0.0
+    nested = 0.0
+
+    def __enter__(self) -> 'Untimed':
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+UNTIMED = Untimed()
+
+
+class Timing():
+    """
+    Record where the time goes when commands are executed. Every command
+    gets a record with the time spent in each phase, see PHASES. Records
+    are kept per thread, so commands executed concurrently in batch mode
+    are measured separately.
+
+    Nothing is measured unless timing is enabled.
+
+    """
+
+    enabled: bool = False
+    lock = threading.Lock()
+    local = threading.local()
+    records: list = []
+    startup: dict = dict()
+    completions: list = []
+
+    @classmethod
+    def configure(cls, enabled: bool) -> None:
+        cls.enabled = enabled
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls.lock:
+            cls.records = []
+            cls.completions = []
+
+    @classmethod
+    def current(cls) -> Optional[dict]:
+        return getattr(cls.local, 'record', None)
+
+    @classmethod
+    def start(cls, command: str) -> bool:
+        """
+        Start to measure a command in this thread. Returns False if timing
+        is off or if a command is already measured, commands executing
+        other commands are only measured once.
+
+        """
+
+        if not cls.enabled or cls.current() is not None:
+            return False
+
+        cls.local.record = {'command': command, 'started': time.time(),
+                            'phases': dict()}
+        cls.local.nested = 0.0
+
+        return True
+
+    @classmethod
+    def finish(cls) -> Optional[dict]:
+        """
+        Stop measuring the command in this thread. Commands where nothing
+        was measured, for example builtins, are not recorded.
+
+        """
+
+        record = cls.current()
+        cls.local.record = None
+
+        if record is not None and record['phases'] != dict():
+            cls.local.last = record
+            with cls.lock:
+                cls.records.append(record)
+
+        return record
+
+    @classmethod
+    def last(cls) -> Optional[dict]:
+        """
+        Return the last command recorded in this thread, only once
+
+        """
+
+        record = getattr(cls.local, 'last', None)
+        cls.local.last = None
+
+        return record
+
+    @classmethod
+    def command(cls, command: str) -> 'CommandTiming':
+        """
+        Measure a command while the returned context is entered, this also
+        works in generators which are not consumed to the end.
+
+        """
+
+        return CommandTiming(command)
+
+    @classmethod
+    def add(cls, phase: str, seconds: float) -> None:
+        record = cls.current()
+
+        if record is not None:
+            phases = record['phases']
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+    @classmethod
+    def phase(cls, name: Optional[str]):
+        """
+        Return a context measuring a phase of the current command. Without
+        a name the time is not recorded, but still excluded from outer
+        phases.
+
+        """
+
+        if cls.current() is None:
+            return UNTIMED
+
+        return Phase(name)
+
+    @classmethod
+    def timed(cls, name: str) -> Callable:
+        """
+        Decorator measuring a function as a phase
+
+        """
+
+        def decorator(function: Callable) -> Callable:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if cls.current() is None:
+                    return function(*args, **kwargs)
+                with Phase(name):
+                    return function(*args, **kwargs)
+            return wrapper
+
+        return decorator
+
+    @classmethod
+    def iterate(cls, name: str, iterator: Iterator[str]) -> Iterator[str]:
+        """
+        Measure the time spent producing the chunks of a lazily rendered
+        output.
+
+        """
+
+        if cls.current() is None:
+            return iterator
+
+        def measured():
+            while True:
+                with Phase(name):
+                    try:
+                        chunk = next(iterator)
+                    except StopIteration:
+                        return
+                yield chunk
+
+        return measured()
+
+    @classmethod
+    def capture(cls) -> 'Capture':
+        """
+        Return a context collecting the phases measured in this thread in
+        a dict, used where requests are made on behalf of another thread.
+
+        """
+
+        return Capture()
+
+    @classmethod
+    def response(cls, request: Phase, res) -> None:
+        """
+        Split the time of a request in connecting, waiting for the first
+        byte and transferring the response. The request phase must not
+        have a name.
+
+        """
+
+        if cls.current() is None:
+            return
+
+        connecting = sum(res.timing.values())
+        ttfb = max(res.elapsed - connecting, 0.0)
+        transfer = max(request.elapsed - connecting - ttfb, 0.0)
+
+        for phase in res.timing:
+            cls.add(phase, res.timing[phase])
+        cls.add('ttfb', ttfb)
+        cls.add('transfer', transfer)
+
+    @classmethod
+    def completion(cls, seconds: float) -> None:
+        if cls.enabled:
+            with cls.lock:
+                cls.completions.append(seconds)
+
+    @classmethod
+    def format(cls, record: dict) -> str:
+        """
+        Return the phases of one command on a line
+
+        """
+
+        phases = record['phases']
+        total = sum(phases.values())
+        nms = sum(phases.get(x, 0.0) for x in NMS)
+        network = sum(phases.get(x, 0.0) for x in NETWORK)
+        parts = ['%s %.1f ms' % (x, phases[x] * 1000) for x in PHASES
+                 if x in phases]
+
+        return 'Timing: %s\nTotal %.1f ms: NMS %.1f ms, network %.1f ms, ' \
+            'client %.1f ms\n' % (', '.join(parts), total * 1000, nms * 1000,
+                                  network * 1000,
+                                  (total - nms - network) * 1000)
+
+    @classmethod
+    def summary(cls) -> str:
+        """
+        Return a summary of all commands measured in this session
+
+        """
+
+        with cls.lock:
+            records = list(cls.records)
+            completions = list(cls.completions)
+
+        output = 'Timing is %s, %d commands measured\n' % \
+            ('on' if cls.enabled else 'off', len(records))
+
+        if cls.startup != dict():
+            output += 'Startup: %s\n' % ', '.join(
+                '%s %.1f ms' % (x, cls.startup[x] * 1000)
+                for x in cls.startup)
+
+        if completions != []:
+            output += 'Completion: %d lookups, mean %.2f ms, max %.2f ms\n' % \
+                (len(completions), sum(completions) / len(completions) * 1000,
+                 max(completions) * 1000)
+
+        if records == []:
+            return output + '\n'
+
+        output += '\n  %-10s %12s %12s %12s\n' % ('Phase', 'Total (ms)',
+                                                  'Mean (ms)', 'Max (ms)')
+
+        for phase in PHASES:
+            times = [x['phases'][phase] for x in records
+                     if phase in x['phases']]
+            if times == []:
+                continue
+            output += '  %-10s %12.1f %12.2f %12.2f\n' % \
+                (phase, sum(times) * 1000, sum(times) / len(times) * 1000,
+                 max(times) * 1000)
+
+        return output + '\n'
+
+    @classmethod
+    def export(cls, filename: str) -> None:
+        """
+        Save all measurements as JSON. Raises OSError on failure.
+
+        """
+
+        with cls.lock:
+            data = {'startup': cls.startup,
+                    'completions': cls.completions,
+                    'commands': cls.records}
+
+            with open(filename, 'w') as fd:
+                json.dump(data, fd, indent=2)
+
+    @classmethod
+    def profile(cls, filename: str) -> None:
+        """
+        Run the CLI under cProfile and save the statistics to filename when
+        we exit. The measurements are saved as JSON next to it and a
+        summary is printed on standard error.
+
+        Only the main thread is profiled.
+
+        """
+
+        profiler = cProfile.Profile()
+
+        def save():
+            profiler.disable()
+            profiler.dump_stats(filename)
+            cls.export(filename + '.json')
+            print(cls.summary(), end='', file=sys.stderr)
+
+        cls.configure(True)
+        atexit.register(save)
+        profiler.enable()
+
+
+class CommandTiming():
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self.started = False
+
+    def __enter__(self) -> None:
+        self.started = Timing.start(self.command)
+
+    def __exit__(self, *exc) -> bool:
+        if self.started:
+            Timing.finish()
+
+        return False
+
+
+class Capture():
+    def __enter__(self) -> dict:
+        self.record = None
+
+        if not Timing.enabled:
+            return dict()
+
+        self.record = {'command': None, 'phases': dict()}
+        Timing.local.record = self.record
+        Timing.local.nested = 0.0
+
+        return self.record['phases']
+
+    def __exit__(self, *exc) -> bool:
+        if self.record is not None:
+            Timing.local.record = None
+
+        return False
+
+
+def connection_classes() -> tuple:
+    """
+    Return urllib3 connection pool classes which measure how long it takes
+    to connect and to set up TLS.
+
+    """
+
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class TimedConnection():
+        def _new_conn(self):
+            with Timing.phase('connect') as phase:
+                conn = super()._new_conn()
+            self.connect_time = phase.elapsed
+            return conn
+
+    class TimedHTTPConnection(TimedConnection, HTTPConnection):
+        pass
+
+    class TimedHTTPSConnection(TimedConnection, HTTPSConnection):
+        def connect(self):
+            self.connect_time = 0.0
+            with Timing.phase(None) as phase:
+                super().connect()
+            Timing.add('tls', phase.elapsed - self.connect_time)
+
+    class TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = TimedHTTPConnection
+
+    class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TimedHTTPSConnection
+
+    return (TimedHTTPConnectionPool, TimedHTTPSConnectionPool)
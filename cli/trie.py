@@ -0,0 +1,45 @@
+from typing import Iterable, Optional
+
+
+class Trie():
+    """
+    Prefix tree used for completion. Every node keeps the words below it
+    in the order they were added, so looking up a prefix only costs the
+    length of the prefix and no words have to be filtered.
+
+    """
+
+    def __init__(self, words: Optional[Iterable[str]] = None) -> None:
+        self.root: dict = {'words': [], 'next': dict()}
+        self.known: set = set()
+
+        for word in words or []:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        if word in self.known:
+            return
+
+        self.known.add(word)
+        node = self.root
+        node['words'].append(word)
+
+        for character in word:
+            node = node['next'].setdefault(character,
+                                           {'words': [], 'next': dict()})
+            node['words'].append(word)
+
+    def words(self, prefix: Optional[str] = '') -> list:
+        """
+        Return all words starting with prefix
+
+        """
+
+        node = self.root
+
+        for character in prefix:
+            if character not in node['next']:
+                return []
+            node = node['next'][character]
+
+        return list(node['words'])
@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from cli.engine import Engine
+from cli.monitor import JOB_DONE
+from cli.rest import Rest
+from cli.terminal import get_hline
+
+
+class JobWatcher():
+    """
+    Follow the jobs started during the session on the event loop and
+    report when they are done.
+
+    Reports are passed to a notify function while the CLI is waiting at
+    the prompt, otherwise they are kept until the prompt is shown again.
+
+    """
+
+    url: str = ''
+    token: str = ''
+    interval: float = 5.0
+    lock = threading.Lock()
+    wakeup: Optional[asyncio.Event] = None
+    task: Optional[Future] = None
+    notify: Optional[Callable] = None
+    at_prompt: bool = False
+    jobs: dict = dict()
+    pending: list = []
+
+    @classmethod
+    def configure(cls, url: str, token: str,
+                  interval: Optional[float] = 5.0) -> None:
+        """
+        Set URL and token used to talk to the NMS and forget all jobs
+
+        """
+
+        cls.url = url
+        cls.token = token
+        cls.interval = interval
+
+        with cls.lock:
+            cls.jobs = dict()
+            cls.pending = []
+
+        if cls.hook not in Rest.hooks:
+            Rest.add_hook(cls.hook)
+
+    @classmethod
+    def hook(cls, method: str, command: str, data: dict) -> None:
+        """
+        Watch every job started by a command
+
+        """
+
+        if method != 'GET' and 'job_id' in data:
+            cls.watch(data['job_id'], command)
+
+    @classmethod
+    def watch(cls, job_id: int, command: str) -> None:
+        with cls.lock:
+            cls.jobs[job_id] = {'id': job_id, 'command': command,
+                                'status': 'SCHEDULED',
+                                'started': time.time(), 'finished': None}
+
+        if cls.wakeup is not None:
+            Engine.call_soon(cls.wakeup.set)
+
+    @classmethod
+    def active(cls) -> list:
+        with cls.lock:
+            return [x for x in cls.jobs if cls.jobs[x]['finished'] is None]
+
+    @classmethod
+    def start(cls, notify: Callable) -> None:
+        """
+        Start watching in the background, notify is called with a message
+        every time a job is done.
+
+        """
+
+        cls.notify = notify
+
+        if cls.task is not None and not cls.task.done():
+            return
+
+        cls.task = Engine.submit(cls.run())
+
+    @classmethod
+    async def run(cls) -> None:
+        cls.wakeup = asyncio.Event()
+
+        while True:
+            # Sleep until a job is started when there is nothing to watch
+            timeout = cls.interval if cls.active() != [] else None
+            try:
+                await asyncio.wait_for(cls.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            cls.wakeup.clear()
+
+            await asyncio.gather(*[cls.poll(x) for x in cls.active()])
+
+    @classmethod
+    async def poll(cls, job_id: int) -> None:
+        try:
+            job = (await Rest.afetch('job %d' % job_id, cls.token,
+                                     cls.url))['data']['jobs'][0]
+        except Exception:
+            return
+
+        with cls.lock:
+            watched = cls.jobs[job_id]
+            watched['status'] = job['status']
+            if job['status'] not in JOB_DONE:
+                return
+            watched['finished'] = time.time()
+
+        if job['status'] == 'FINISHED':
+            color = '\033[92m'
+        else:
+            color = '\033[91m'
+
+        cls.report('%sJob %d (%s) is done with status %s after %ds\033[0m' %
+                   (color, job_id, watched['command'], job['status'],
+                    watched['finished'] - watched['started']))
+
+    @classmethod
+    def report(cls, message: str) -> None:
+        with cls.lock:
+            notify = cls.notify if cls.at_prompt else None
+            if notify is None:
+                cls.pending.append(message)
+                return
+
+        # Not called with the lock held, notify may call us again
+        notify(message)
+
+    @classmethod
+    def prompt(cls, waiting: bool) -> list:
+        """
+        Tell the watcher whether we are waiting at the prompt or not.
+
+        Returns the reports kept since the last time.
+
+        """
+
+        with cls.lock:
+            cls.at_prompt = waiting
+            pending = cls.pending
+            cls.pending = []
+
+        return pending
+
+    @classmethod
+    def watched(cls) -> str:
+        """
+        Return a table with all jobs started during the session
+
+        """
+
+        if cls.jobs == dict():
+            return 'No jobs started in this session\n\n'
+
+        output = [' %-10s | %-20s | %-10s | %-10s\n' %
+                  ('ID', 'Command', 'Status', 'Time'), get_hline(newline=True)]
+
+        with cls.lock:
+            for job in cls.jobs.values():
+                finished = job['finished'] or time.time()
+                output.append(' %-10s | %-20s | %-10s | %-10s\n' %
+                              (job['id'], job['command'], job['status'],
+                               '%ds' % (finished - job['started'])))
+
+        return ''.join(output) + '\n'
@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    """
+    Keep the cache of every test in a directory of its own, so that tests
+    never read or write the user's cache
+
+    """
+
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+
+    return tmp_path
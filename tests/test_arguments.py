@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+from cli.parser import get_parser
+from cli.rest import Rest
+
+
+class ArgumentTests(unittest.TestCase):
+    def setUp(self):
+        Rest.cli = get_parser('cnaas.yml')
+
+    def parse(self, line):
+        return Rest.parse_args(line, 'http://localhost')
+
+    def test_01_plan_is_reused(self):
+        plan = Rest.cli.get_argument_plan('interfaces')
+        self.assertIs(Rest.cli.get_argument_plan('interfaces'), plan)
+        self.assertEqual(list(plan['slots']), ['hostname'])
+
+    def test_02_url_slot(self):
+        self.assertEqual(self.parse('interfaces hostname esk-a1'),
+                         ('http://localhost/device/esk-a1/interfaces',
+                          {'hostname': 'esk-a1'}))
+
+    def test_03_defaults_and_booleans(self):
+        (url, args) = self.parse('firmware_upgrade hostname a filename f '
+                                 'url u pre_flight download false')
+        self.assertEqual(args['pre_flight'], True)
+        self.assertEqual(args['download'], False)
+
+    def test_04_id_shortcut(self):
+        self.assertEqual(self.parse('device 12'),
+                         ('http://localhost/device/12', {'id': '12'}))
+
+    def test_05_last_job(self):
+        with mock.patch('builtins.print'):
+            (url, args) = self.parse('job')
+        self.assertEqual(url, 'http://localhost/jobs?sort=-id&per_page=1'
+                              '&page=1')
+
+    def test_06_missing_value(self):
+        self.assertEqual(self.parse('device hostname')[0], 'error')
+
+    def test_07_duplicates(self):
+        self.assertEqual(self.parse('sync hostname a group a')[0], 'error')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from unittest import mock
+
+from cli.command import CliHandler
+from cli.rest import Rest
+
+
+class BatchTests(unittest.TestCase):
+    def setUp(self):
+        self.c = CliHandler('http://localhost')
+        self.calls = []
+
+    def request(self, method, command, token, url, modifier=''):
+        self.calls.append((method, command))
+        if 'fail' in command:
+            return (False, 'failed\n')
+        return (True, 'ok\n')
+
+    def batch(self, lines, continue_on_error=False):
+        with mock.patch.object(Rest, 'request', side_effect=self.request), \
+                mock.patch('builtins.print'):
+            return self.c.batch(lines, continue_on_error)
+
+    def test_01_all_successful(self):
+        status = self.batch(['# comment', '', 'show devices',
+                             'show job 1', 'sync hostname test'])
+        self.assertEqual(status, 0)
+        self.assertEqual(self.calls, [('GET', 'devices'), ('GET', 'job 1'),
+                                      ('POST', 'sync hostname test')])
+
+    def test_02_validate_before_execute(self):
+        status = self.batch(['show devices', 'nope'])
+        self.assertEqual(status, 1)
+        self.assertEqual(self.calls, [])
+
+    def test_03_no_monitor(self):
+        status = self.batch(['show job 1 | monitor'])
+        self.assertEqual(status, 1)
+        self.assertEqual(self.calls, [])
+
+    def test_04_stop_on_first_failure(self):
+        status = self.batch(['sync hostname fail', 'sync hostname test'])
+        self.assertEqual(status, 1)
+        self.assertEqual(self.calls, [('POST', 'sync hostname fail')])
+
+    def test_05_continue_on_error(self):
+        status = self.batch(['sync hostname fail', 'sync hostname test'],
+                            continue_on_error=True)
+        self.assertEqual(status, 1)
+        self.assertEqual(len(self.calls), 2)
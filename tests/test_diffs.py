@@ -0,0 +1,49 @@
+import unittest
+
+from cli.diffs import group_diffs, normalize_diff
+
+
+def result(diff, failed=False, reason=None):
+    return {'failed': failed,
+            'job_tasks': [{'failed': failed, 'result': reason,
+                           'diff': diff}]}
+
+
+class DiffTests(unittest.TestCase):
+    def test_01_normalize(self):
+        self.assertEqual(normalize_diff('+! Saved 2026-10-18T12:00:01Z'),
+                         '+! Saved <timestamp>')
+        self.assertEqual(normalize_diff('-! Mon Oct 18 12:00:01 2026'),
+                         '-! <timestamp>')
+
+    def test_02_grouping(self):
+        devices = [('a', result('+x\n! 2026-10-18 12:00:01')),
+                   ('b', result('+x\n! 2026-10-18 12:00:02')),
+                   ('c', result('+y')),
+                   ('d', result('+y', True, 'timeout'))]
+        rendered = []
+
+        def render(diff):
+            rendered.append(diff)
+            return diff
+
+        groups = list(group_diffs(devices, render).values())
+        self.assertEqual([x['hostnames'] for x in groups],
+                         [['a', 'b'], ['c'], ['d']])
+        self.assertEqual(rendered, ['+x\n! 2026-10-18 12:00:01', '+y',
+                                    '+y'])
+        self.assertEqual(groups[2]['reason'], 'timeout')
+
+    def test_03_no_diff_is_not_carried_over(self):
+        groups = group_diffs([('a', result('+x')), ('b', result(None))],
+                             str)
+        self.assertEqual([x['diff'] for x in groups.values()], ['+x', ''])
+
+    def test_04_without_normalization(self):
+        devices = [('a', result('! 2026-10-18 12:00:01')),
+                   ('b', result('! 2026-10-18 12:00:02'))]
+        self.assertEqual(len(group_diffs(devices, str, normalize=False)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import io
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from cli import session
+from cli.engine import Engine, HTTPError, Response, httpx_available
+from cli.policy import CircuitBreaker, NMSUnreachable, RequestPolicy
+from cli.rest import Rest
+
+
+def response(status_code, content=b'{}', headers=None):
+    return Response('http://localhost', status_code, 'Not Found',
+                    headers or {}, 0.0, content=content)
+
+
+class EngineTests(unittest.TestCase):
+    def test_01_run(self):
+        async def add(a, b):
+            await asyncio.sleep(0)
+            return a + b
+
+        self.assertEqual(Engine.run(add(1, 2)), 3)
+
+    def test_02_run_in_loop(self):
+        async def nested():
+            Engine.run(asyncio.sleep(0))
+
+        with self.assertRaises(RuntimeError):
+            Engine.run(nested())
+
+    def test_03_response(self):
+        self.assertEqual(response(200, b'{"a": 1}').json(), {'a': 1})
+        streamed = Response('http://localhost', 200, 'OK', {}, 0.0,
+                            raw=io.BytesIO(b'[1, 2]'))
+        self.assertEqual(streamed.json(), [1, 2])
+        response(304).raise_for_status()
+        with self.assertRaises(HTTPError):
+            response(404).raise_for_status()
+
+    def test_04_pages_are_fetched_concurrently(self):
+        urls = []
+
+        async def aget(url, token):
+            urls.append(url)
+            page = int(url.split('page=')[1].split('&')[0])
+            rows = [{'id': x} for x in range(5)][(page - 1) * 2:page * 2]
+            return response(200, json.dumps({'data': {'devices': rows}}),
+                            {'X-Total-Count': '5'})
+
+        with mock.patch.object(Rest, 'aget', side_effect=aget):
+            items = Rest.fetch_all('/devices', 'devices', 'token',
+                                   'http://localhost', per_page=2)
+
+        self.assertEqual([x['id'] for x in items], [0, 1, 2, 3, 4])
+        self.assertEqual(len(urls), 3)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+
+@unittest.skipUnless(httpx_available(), 'httpx is not installed')
+class ClientTests(unittest.TestCase):
+    def setUp(self):
+        Engine.close()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.url = 'http://127.0.0.1:%d/' % self.server.server_address[1]
+
+    def tearDown(self):
+        Engine.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_01_clients_are_shared(self):
+        async def requests(count):
+            return await asyncio.gather(*[Engine.request('GET', self.url)
+                                          for _ in range(count)])
+
+        responses = Engine.run(requests(3 * session.pool_size()))
+        self.assertEqual({x.status_code for x in responses}, {200})
+        self.assertEqual(len(Engine.clients), session.pool_size())
+        self.assertEqual(Engine.idle.qsize(), len(Engine.clients))
+
+        Engine.send('GET', self.url, stream=True).raw.read()
+        self.assertEqual(Engine.idle.qsize(), len(Engine.clients))
+
+    def test_02_client_is_given_back_after_errors(self):
+        RequestPolicy.configure(1.0, 1.0, 0)
+        self.server.shutdown()
+        self.server.server_close()
+
+        try:
+            with self.assertRaises(NMSUnreachable):
+                Engine.send('GET', self.url)
+        finally:
+            RequestPolicy.configure()
+            CircuitBreaker.reset()
+
+        self.assertEqual(len(Engine.clients), 1)
+        self.assertEqual(Engine.idle.qsize(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+from cli.fanout import fanout_arguments, get_targets, is_fanout, show
+from cli.inventory import Inventory
+from cli.rest import Rest
+
+DEVICES = {1: 'esk-a1', 2: 'esk-a2', 3: 'core-1'}
+
+
+def fetch(command, token, url):
+    if command == 'groups':
+        return {'data': {'groups': {'CORE': ['core-1']}}}
+    hostname = command.split(' ')[-1]
+    if hostname == 'esk-a2':
+        raise ValueError('failed')
+    return {'data': {'interfaces': [{'name': 'Ethernet1'}]}}
+
+
+class FanoutTests(unittest.TestCase):
+    def setUp(self):
+        self.patches = [
+            mock.patch.object(Inventory, 'hostnames', return_value=DEVICES),
+            mock.patch.object(Rest, 'fetch', side_effect=fetch),
+            mock.patch.object(Rest, 'afetch', side_effect=fetch),
+            mock.patch('cli.prettyprint.terminal_size',
+                       return_value=(80, 24)),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def test_01_is_fanout(self):
+        self.assertEqual(is_fanout('interfaces hostname a,b'), True)
+        self.assertEqual(is_fanout('interfaces hostname esk-*'), True)
+        self.assertEqual(is_fanout('device group CORE'), True)
+        self.assertEqual(is_fanout('interfaces hostname esk-a1'), False)
+        self.assertEqual(is_fanout('linknets group CORE'), False)
+
+    def test_02_targets(self):
+        targets = get_targets('interfaces hostname esk-*', '', '')
+        self.assertEqual([x['id'] for x in targets], [1, 2])
+        targets = get_targets('interfaces group CORE', '', '')
+        self.assertEqual([x['id'] for x in targets], [3])
+        targets = get_targets('interfaces hostname core-1,esk-a1', '', '')
+        self.assertEqual([x['id'] for x in targets], [1, 3])
+
+    def test_03_merged_output(self):
+        success, output = show('interfaces hostname esk-a1,core-1', '', '')
+        self.assertEqual(success, True)
+        self.assertIn('esk-a1', output)
+        self.assertIn('core-1', output)
+        self.assertEqual(output.count('Ethernet1'), 2)
+
+    def test_04_failed_device(self):
+        success, output = show('interfaces hostname esk-*', '', '')
+        self.assertEqual(success, False)
+        self.assertIn('esk-a2: Could not execute command', output)
+
+    def test_05_no_devices(self):
+        success, output = show('interfaces hostname nope*', '', '')
+        self.assertEqual(success, False)
+
+    def test_06_group_is_not_sent(self):
+        self.assertEqual(fanout_arguments('device'), ['group'])
+        self.assertEqual(fanout_arguments('linknets'), [])
+        self.assertNotIn('group', Rest.parser().get_attributes('device'))
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from cli.engine import Engine
+from cli.httpcache import ResponseCache
+from cli.parser import get_parser
+from cli.rest import Rest
+
+VERSION = {'status': 'success', 'data': {'version': '1.0'}}
+
+
+class Response():
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers or {}
+
+    def json(self):
+        return self.data
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = tempfile.mkdtemp()
+        self.env = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.cache})
+        self.env.start()
+        Rest.cli = get_parser('cnaas.yml')
+        ResponseCache.configure(True)
+        self.session = mock.Mock()
+        self.patch = mock.patch.object(Engine, 'send', self.session.request)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.env.stop()
+        ResponseCache.configure(False)
+        shutil.rmtree(self.cache)
+
+    def show(self, command, modifier=''):
+        return Rest.request('GET', command, 'token', 'http://localhost',
+                            modifier)
+
+    def test_01_fresh_response_is_used(self):
+        self.session.request.return_value = Response(200, VERSION)
+        first = self.show('version')
+        self.assertEqual(self.show('version'), first)
+        self.assertEqual(self.session.request.call_count, 1)
+
+    def test_02_not_cached_without_ttl(self):
+        self.session.request.return_value = Response(
+            200, {'status': 'success', 'data': {'mgmtdomains': []}})
+        self.show('mgmtdomains')
+        self.show('mgmtdomains')
+        self.assertEqual(self.session.request.call_count, 2)
+
+    def test_03_revalidation(self):
+        self.session.request.return_value = Response(200, VERSION,
+                                                     {'ETag': '"v1"'})
+        first = self.show('version')
+        ResponseCache.entries = ResponseCache.load()
+        for entry in ResponseCache.entries.values():
+            entry['stored'] -= 7200
+        ResponseCache.save()
+
+        self.session.request.return_value = Response(304)
+        self.assertEqual(self.show('version'), first)
+        headers = self.session.request.call_args[1]['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+
+    def test_04_refresh(self):
+        self.session.request.return_value = Response(200, VERSION)
+        self.show('version')
+        self.show('version', ' refresh')
+        self.assertEqual(self.session.request.call_count, 2)
+
+    def test_05_invalidated_by_writes(self):
+        self.session.request.return_value = Response(
+            200, {'status': 'success', 'data': {'files': ['a.swi']}})
+        self.show('files')
+        self.session.request.return_value = Response(
+            200, {'status': 'success', 'data': 'Scheduled', 'job_id': 1})
+        Rest.request('POST', 'firmware_upgrade hostname a filename a.swi',
+                     'token', 'http://localhost')
+        self.assertEqual(ResponseCache.load(), {})
+
+    def test_06_disabled(self):
+        ResponseCache.configure(False)
+        self.session.request.return_value = Response(200, VERSION)
+        self.show('version')
+        self.show('version')
+        self.assertEqual(self.session.request.call_count, 2)
+
+    def test_07_writes_without_cache(self):
+        ResponseCache.configure(False)
+        self.session.request.return_value = Response(
+            200, {'status': 'success', 'data': 'Scheduled', 'job_id': 1})
+        with mock.patch.object(ResponseCache, 'invalidate') as invalidate:
+            Rest.request('POST', 'firmware_upgrade hostname a filename a.swi',
+                         'token', 'http://localhost')
+        invalidate.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
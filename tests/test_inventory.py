@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from cli.command import CliHandler
+from cli.engine import Engine
+from cli.inventory import Inventory
+from cli.rest import Rest
+
+DEVICES = [{'id': 1, 'hostname': 'esk-a1'}, {'id': 2, 'hostname': 'esk-a2'}]
+
+
+class InventoryTests(unittest.TestCase):
+    def setUp(self):
+        Inventory.configure('http://localhost', 'token')
+        self.patch = mock.patch.object(Rest, 'fetch_all',
+                                       return_value=DEVICES)
+        self.fetch_all = self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_01_hostnames_are_cached(self):
+        self.assertEqual(Inventory.hostnames(), {1: 'esk-a1', 2: 'esk-a2'})
+        Inventory.hostnames()
+        self.assertEqual(self.fetch_all.call_count, 1)
+
+    def test_02_ttl(self):
+        Inventory.hostnames()
+        Inventory.updated -= Inventory.ttl + 1
+        Inventory.hostnames()
+        self.assertEqual(self.fetch_all.call_count, 2)
+
+    def test_03_invalidated_by_device_changes(self):
+        Inventory.hostnames()
+        Inventory.hook('GET', 'device', {})
+        Inventory.hostnames()
+        self.assertEqual(self.fetch_all.call_count, 1)
+        Inventory.hook('DELETE', 'device', {})
+        Inventory.hostnames()
+        self.assertEqual(self.fetch_all.call_count, 2)
+
+    def test_04_failed_download_is_not_cached(self):
+        self.fetch_all.side_effect = ValueError('failed')
+        with self.assertRaises(ValueError):
+            Inventory.hostnames()
+        self.fetch_all.side_effect = None
+        self.assertEqual(len(Inventory.hostnames()), 2)
+
+
+class CompletionTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = tempfile.mkdtemp()
+        self.env = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.cache})
+        self.env.start()
+        Inventory.configure('http://localhost', 'token')
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.cache)
+
+    def fetch(self, command, token, url):
+        if command == 'groups':
+            return {'data': {'groups': {'CORE': [], 'ACCESS': []}}}
+        raise ValueError('failed')
+
+    def refresh(self):
+        jobs = mock.Mock()
+        jobs.json.return_value = {'data': {'jobs': [{'id': 9}, {'id': 8}]}}
+        with mock.patch.object(Rest, 'afetch_all', return_value=DEVICES), \
+                mock.patch.object(Rest, 'afetch', side_effect=self.fetch), \
+                mock.patch.object(Rest, 'aget', return_value=jobs) as aget:
+            Engine.run(Inventory.refresh())
+
+        # Only the job ids are used
+        self.assertTrue(aget.call_args[0][0].endswith('&fields=id'))
+
+    def test_01_values(self):
+        self.refresh()
+        self.assertEqual(Inventory.complete('sync', 'hostname'),
+                         ['esk-a1', 'esk-a2'])
+        self.assertEqual(Inventory.complete('sync', 'group'),
+                         ['ACCESS', 'CORE'])
+        self.assertEqual(Inventory.complete('device', 'id'), ['1', '2'])
+        self.assertEqual(Inventory.complete('job', 'id'), ['9', '8'])
+        self.assertEqual(Inventory.complete('firmware_upgrade', 'filename'),
+                         [])
+        self.assertEqual(Inventory.complete('sync', 'dry_run'), None)
+
+    def test_02_values_are_saved(self):
+        self.refresh()
+        Inventory.set_values(dict())
+        Inventory.configure('http://localhost', 'token')
+        self.assertEqual(Inventory.complete('sync', 'hostname'),
+                         ['esk-a1', 'esk-a2'])
+
+    def test_03_completer(self):
+        self.refresh()
+        cli = CliHandler('http://localhost')
+        with mock.patch('readline.get_line_buffer',
+                        return_value='sync hostname esk-a'):
+            self.assertEqual(cli.candidates(), ['esk-a1', 'esk-a2'])
+        with mock.patch('readline.get_line_buffer',
+                        return_value='sync hostname esk-a1 dry'):
+            self.assertEqual(cli.candidates(), ['dry_run'])
+        with mock.patch('readline.get_line_buffer',
+                        return_value='show jobs status R'):
+            self.assertEqual(cli.candidates(), ['RUNNING'])
+        with mock.patch('readline.get_line_buffer',
+                        return_value='timing o'):
+            self.assertEqual(cli.candidates(), ['on', 'off'])
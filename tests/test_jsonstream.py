@@ -0,0 +1,51 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+from cli import jsonstream
+from cli.prettyprint import prettyprint_jobs_single
+
+JOB = {'status': 'success', 'data': {'jobs': [{
+    'id': 1, 'status': 'FINISHED', 'scheduled_time': 'a', 'start_time': 'b',
+    'finish_time': 'c', 'scheduled_by': 'x', 'comment': 'c',
+    'function_name': 'sync', 'next_job_id': None, 'exception': None,
+    'finished_devices': ['a.b', 'c'],
+    'result': {'message': 'ok', 'devices': {
+        'a.b': {'failed': False, 'job_tasks': [
+            {'failed': False, 'result': None, 'diff': '+x\\n-y'}]},
+        'c': {'failed': False, 'job_tasks': [
+            {'failed': False, 'result': None, 'diff': '+x\\n-y'}]},
+        'd': {'failed': True, 'job_tasks': [
+            {'failed': True, 'result': 'timeout', 'diff': None}]},
+    }}}]}}
+
+
+@unittest.skipUnless(jsonstream.available(), 'ijson is not installed')
+class JsonStreamTests(unittest.TestCase):
+    def setUp(self):
+        self.patch = mock.patch('cli.terminal.terminal_size',
+                                return_value=(20, 10))
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_01_devices_are_grouped_while_parsing(self):
+        data = jsonstream.load_job(io.BytesIO(json.dumps(JOB).encode()))
+        result = data['data']['jobs'][0]['result']
+        self.assertEqual(result['devices'], {})
+        self.assertEqual([x['hostnames'] for x in
+                          result['device_groups'].values()],
+                         [['a.b', 'c'], ['d']])
+        self.assertEqual(data['data']['jobs'][0]['finished_devices'],
+                         ['a.b', 'c'])
+
+    def test_02_same_output(self):
+        data = jsonstream.load_job(io.BytesIO(json.dumps(JOB).encode()))
+        self.assertEqual(prettyprint_jobs_single(data),
+                         prettyprint_jobs_single(json.loads(json.dumps(JOB))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from cli.modifiers import apply_modifiers, parse_modifiers, validate_modifiers
+
+OUTPUT = ['esk-a1 MANAGED\nesk-a2 UNMANAGED\n', 'core-1 MANAGED\n',
+          'core-2 ', 'DISCOVERED\n']
+
+
+def run(modifier, chunks=OUTPUT):
+    return ''.join(apply_modifiers(iter(chunks), modifier))
+
+
+class ModifierTests(unittest.TestCase):
+    def test_01_parse(self):
+        self.assertEqual(parse_modifiers(' grep foo bar | head 5'),
+                         [('grep', 'foo bar'), ('head', '5')])
+
+    def test_02_validate(self):
+        self.assertEqual(validate_modifiers(' grep x | count'), '')
+        self.assertNotEqual(validate_modifiers(' grep x | nope'), '')
+        self.assertNotEqual(validate_modifiers(' head x'), '')
+        self.assertEqual(validate_modifiers(' grep -E ^(up)+$'), '')
+        self.assertTrue(validate_modifiers(' grep -E (up').startswith(
+            'Invalid regular expression: '))
+        self.assertTrue(validate_modifiers(' exclude -i -E [a').startswith(
+            'Invalid regular expression: '))
+
+    def test_03_grep(self):
+        self.assertEqual(run(' grep MANAGED'),
+                         'esk-a1 MANAGED\nesk-a2 UNMANAGED\n'
+                         'core-1 MANAGED\n\n')
+        self.assertEqual(run(' grep -i managed | grep -m 1 core'),
+                         'core-1 MANAGED\n\n')
+        self.assertEqual(run(' grep -E ^core-[0-9] M'),
+                         'core-1 MANAGED\n\n')
+
+    def test_04_exclude(self):
+        self.assertEqual(run(' exclude MANAGED'), 'core-2 DISCOVERED\n\n')
+
+    def test_05_head_and_count(self):
+        self.assertEqual(run(' head 1'), 'esk-a1 MANAGED\n\n')
+        self.assertEqual(run(' grep esk | count'), '  2\n\n')
+
+    def test_06_stop_early(self):
+        consumed = []
+
+        def chunks():
+            for chunk in OUTPUT:
+                consumed.append(chunk)
+                yield chunk
+
+        self.assertEqual(run(' head 2', chunks()),
+                         'esk-a1 MANAGED\nesk-a2 UNMANAGED\n\n')
+        self.assertEqual(consumed, OUTPUT[:1])
+
+    def test_07_no_filter(self):
+        self.assertEqual(run(' detailed'), ''.join(OUTPUT) + '\n')
@@ -0,0 +1,133 @@
+import time
+import unittest
+from unittest import mock
+
+from cli.engine import Engine
+from cli.monitor import JobsMonitor, Monitor, job_status
+from cli.parser import get_parser
+from cli.policy import CircuitBreaker
+from cli.rest import Rest
+
+
+def job(status):
+    return {'data': {'jobs': [{'id': 7, 'status': status}]}}
+
+
+class Response():
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers or {}
+
+    def json(self):
+        return self.data
+
+
+class MonitorTests(unittest.TestCase):
+    def setUp(self):
+        Rest.cli = get_parser('cnaas.yml')
+        self.monitor = Monitor('job', 'token', 'http://localhost')
+
+    def test_01_job_status(self):
+        self.assertEqual(job_status(job('RUNNING')), 'RUNNING')
+        self.assertEqual(job_status({'data': {'jobs': []}}), None)
+        self.assertEqual(job_status('output'), None)
+
+    def test_02_interval_backs_off_and_resets(self):
+        self.assertEqual(self.monitor.next_interval(False), 1.5)
+        for _ in range(20):
+            self.monitor.next_interval(False)
+        self.assertEqual(self.monitor.interval, 30.0)
+        self.assertEqual(self.monitor.next_interval(True), 1.0)
+
+    def test_03_conditional_requests(self):
+        responses = [Response(200, job('RUNNING'), {'ETag': '"a"'}),
+                     Response(304)]
+        with mock.patch.object(Rest, 'get_response',
+                               side_effect=responses) as get_response:
+            self.assertTrue(self.monitor.poll())
+            self.assertFalse(self.monitor.poll())
+
+        self.assertEqual(get_response.call_args[1]['headers'],
+                         {'If-None-Match': '"a"'})
+
+    def test_04_last_job_is_resolved(self):
+        with mock.patch.object(Rest, 'get_response',
+                               return_value=Response(200, job('RUNNING'))):
+            self.monitor.poll()
+            self.assertFalse(self.monitor.poll())
+
+        self.assertEqual(self.monitor.command, 'job 7')
+
+    def test_05_first_poll_fails(self):
+        self.monitor.interval = 30.0
+        with mock.patch.object(Rest, 'get_response',
+                               side_effect=ValueError('Broken')), \
+                mock.patch.object(self.monitor.screen, 'draw') as draw:
+            self.assertEqual(self.monitor.update(), 5.0)
+
+        (lines, footer) = draw.call_args[0]
+        self.assertEqual(lines, [])
+        self.assertTrue(footer.startswith('Could not execute command: '
+                                          'Broken. '))
+
+    def test_06_circuit_open(self):
+        CircuitBreaker.opened = time.monotonic()
+        CircuitBreaker.cause = 'Connection refused'
+
+        try:
+            with mock.patch.object(Engine, 'transport') as transport, \
+                    mock.patch.object(self.monitor.screen, 'draw') as draw:
+                self.assertEqual(self.monitor.update(), 1.5)
+        finally:
+            CircuitBreaker.reset()
+
+        transport.assert_not_called()
+        self.assertIn('The NMS is not responding (Connection refused)',
+                      draw.call_args[0][1])
+
+
+class JobsMonitorTests(unittest.TestCase):
+    def setUp(self):
+        Rest.cli = get_parser('cnaas.yml')
+        self.monitor = JobsMonitor('jobs status RUNNING', 'token',
+                                   'http://localhost')
+
+    def test_01_status_filter(self):
+        (url, args) = Rest.parse_args('jobs status RUNNING',
+                                      'http://localhost')
+        self.assertEqual(url, 'http://localhost/jobs?sort=-id&'
+                         'filter[status]=RUNNING')
+        self.assertEqual(args, {})
+
+    def test_02_finished_jobs_are_dropped(self):
+        listing = [{'data': {'jobs': [job('RUNNING')['data']['jobs'][0],
+                                      {'id': 8, 'status': 'RUNNING'}]}}]
+        with mock.patch.object(Rest, 'pages', return_value=listing):
+            self.assertTrue(self.monitor.poll())
+
+        def fetch(command, token, url):
+            if command == 'job 7':
+                return job('FINISHED')
+            return {'data': {'jobs': [{'id': 8, 'status': 'RUNNING'}]}}
+
+        with mock.patch.object(Rest, 'afetch', side_effect=fetch):
+            self.assertTrue(self.monitor.poll())
+
+        self.assertEqual(list(self.monitor.jobs), [8])
+        self.assertEqual(self.monitor.finished, {7: 'FINISHED'})
+        self.assertFalse(self.monitor.done())
+        self.assertIn('  1 active, 1 finished, 0 aborted, 0 exception',
+                      self.monitor.render())
+
+    def test_03_failed_listing_is_not_done(self):
+        with mock.patch.object(Rest, 'pages', side_effect=KeyError('data')), \
+                mock.patch.object(self.monitor.screen, 'draw') as draw:
+            self.assertIsNotNone(self.monitor.update())
+
+        self.assertIn('Unexpected response from the NMS',
+                      draw.call_args[0][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
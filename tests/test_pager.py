@@ -0,0 +1,62 @@
+import unittest
+from unittest import mock
+
+from cli.pager import Pager
+
+
+def output(pulled, lines=1000):
+    for nr in range(lines):
+        pulled.append(nr)
+        yield '\033[92m line %d\n' % nr
+
+
+class PagerTests(unittest.TestCase):
+    def setUp(self):
+        self.patch = mock.patch('cli.pager.terminal_size',
+                                return_value=(40, 11))
+        self.patch.start()
+        self.pulled = []
+        self.pager = Pager(output(self.pulled))
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_01_lines_are_pulled_lazily(self):
+        self.assertFalse(self.pager.fits())
+        self.assertEqual(len(self.pulled), 11)
+        self.pager.scroll(10)
+        self.assertEqual(self.pager.top, 10)
+        self.assertEqual(len(self.pulled), 20)
+
+    def test_02_short_output_fits(self):
+        pager = Pager(output([], 5))
+        self.assertTrue(pager.fits())
+        self.assertEqual(len(pager.lines), 5)
+
+    def test_03_search(self):
+        self.pager.pattern = 'line 50$'
+        self.pager.search()
+        self.assertEqual(self.pager.top, 50)
+        self.assertEqual(len(self.pulled), 60)
+        self.pager.pattern = 'line 4'
+        self.pager.search(backwards=True)
+        self.assertEqual(self.pager.top, 49)
+
+    def test_04_search_near_the_end(self):
+        self.pager.pattern = 'line 99[5-7]$'
+        for match in [995, 996, 997]:
+            self.pager.search()
+            self.assertEqual(self.pager.last_match, match)
+            self.assertEqual(self.pager.top, 990)
+        self.pager.search(backwards=True)
+        self.assertEqual(self.pager.last_match, 996)
+
+    def test_05_end(self):
+        self.pager.end()
+        self.assertEqual(self.pager.top, 990)
+        self.pager.scroll(10)
+        self.assertEqual(self.pager.top, 990)
+
+
+if __name__ == '__main__':
+    unittest.main()
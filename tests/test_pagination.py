@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+
+from cli.rest import Rest
+
+
+def page(first, count):
+    return {'data': {'devices': [{'id': x, 'hostname': 'esk-%d' % x}
+                                 for x in range(first, first + count)]}}
+
+
+class PaginationTests(unittest.TestCase):
+    def setUp(self):
+        self.fetched = []
+        self.patches = [
+            mock.patch.object(Rest, 'pages', side_effect=self.pages),
+            mock.patch('cli.prettyprint.terminal_size',
+                       return_value=(80, 24)),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def pages(self, url, name, token, args=None, per_page=100):
+        self.url = url
+        for nr in range(3):
+            self.fetched.append(nr)
+            yield page(nr * 10 + 1, 10)
+
+    def test_01_is_listing(self):
+        self.assertEqual(Rest.is_listing('GET', 'devices'), True)
+        self.assertEqual(Rest.is_listing('GET', 'device id 1'), False)
+        self.assertEqual(Rest.is_listing('POST', 'devices'), False)
+
+    def test_02_all_pages(self):
+        output = ''.join(Rest.stream('GET', 'devices', '', ''))
+        self.assertEqual(self.fetched, [0, 1, 2])
+        self.assertEqual(output.count('Hostname'), 1)
+        self.assertEqual(output.count('esk-'), 30)
+
+    def test_03_stop_early(self):
+        output = ''.join(Rest.stream('GET', 'devices', '', '',
+                                     modifier=' grep -m 2 esk-2'))
+        self.assertEqual(self.fetched, [0, 1])
+        self.assertEqual(output.count('esk-2'), 2)
+
+    def test_04_request(self):
+        success, output = Rest.request('GET', 'devices', '', '',
+                                       modifier=' grep esk-2')
+        self.assertEqual(success, True)
+        self.assertEqual(output.count('esk-2'), 11)
+
+    def test_05_projection(self):
+        ''.join(Rest.stream('GET', 'jobs', '', ''))
+        self.assertIn('fields=id,status,', self.url)
+        self.assertNotIn('comment', self.url)
+
+        # Devices print every field which isn't forbidden
+        ''.join(Rest.stream('GET', 'devices', '', ''))
+        self.assertNotIn('fields=', self.url)
+
+        ''.join(Rest.stream('GET', 'jobs status RUNNING', '', '',
+                            modifier=' detailed'))
+        self.assertIn('filter[status]=RUNNING&fields=id,status,', self.url)
+        self.assertIn('comment', self.url)
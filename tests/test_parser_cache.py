@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from cli.parser import CliParser, get_parser
+
+
+class ParserCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = tempfile.mkdtemp()
+        self.env = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.cache})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.cache)
+
+    def test_01_cache_is_written(self):
+        CliParser('cnaas.yml')
+        self.assertNotEqual(os.listdir(os.path.join(self.cache,
+                                                    'cnaas-cli')), [])
+
+    def test_02_cache_is_used(self):
+        parser = CliParser('cnaas.yml')
+
+        with mock.patch.object(CliParser,
+                               '_CliParser__yaml_read') as yaml_read:
+            cached = CliParser('cnaas.yml')
+            yaml_read.assert_not_called()
+
+        self.assertEqual(cached.get_commands(), parser.get_commands())
+        self.assertEqual(cached.get_url('device'), parser.get_url('device'))
+
+    def test_03_outdated_cache_is_ignored(self):
+        spec = os.path.join(self.cache, 'spec.yml')
+        shutil.copy('cnaas.yml', spec)
+        CliParser(spec)
+
+        with open(spec, 'a') as fd:
+            fd.write("""
+  - command:
+      name: 'extra'
+      description: 'Extra command'
+      url: '/extra'
+""")
+
+        self.assertEqual(CliParser(spec).is_command('extra'), True)
+
+    def test_04_shared_parser(self):
+        self.assertIs(get_parser('cnaas.yml'), get_parser('./cnaas.yml'))
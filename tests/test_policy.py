@@ -0,0 +1,110 @@
+import socket
+import unittest
+from unittest import mock
+
+from cli.engine import Engine, Response
+from cli.fanout import show
+from cli.inventory import Inventory
+from cli.policy import (CircuitBreaker, CircuitOpen, NMSUnreachable,
+                        RequestPolicy)
+from cli.rest import Rest
+
+
+def response(status_code):
+    return Response('http://localhost', status_code, 'Service Unavailable',
+                    {}, 0.0, content=b'{}')
+
+
+class PolicyTests(unittest.TestCase):
+    def setUp(self):
+        RequestPolicy.configure(1.0, 1.0, 2)
+        RequestPolicy.backoff = 0.0
+        CircuitBreaker.reset()
+
+    def tearDown(self):
+        RequestPolicy.configure()
+        RequestPolicy.backoff = 0.5
+        CircuitBreaker.reset()
+
+    def send(self, method, results):
+        transport = mock.AsyncMock(side_effect=results)
+
+        with mock.patch.object(Engine, 'transport', transport):
+            try:
+                return (Engine.send(method, 'http://localhost'),
+                        transport.call_count)
+            except Exception as e:
+                return (e, transport.call_count)
+
+    def test_01_delay(self):
+        RequestPolicy.backoff = 0.5
+        for attempt in range(10):
+            delay = RequestPolicy.delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(10.0, 0.5 * 2 ** attempt))
+
+    def test_02_get_is_retried(self):
+        (res, calls) = self.send('GET', [response(503),
+                                         NMSUnreachable('refused'),
+                                         response(200)])
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(calls, 3)
+
+        (res, calls) = self.send('GET', [response(503)] * 3)
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(calls, 3)
+
+    def test_03_write_is_not_retried(self):
+        (res, calls) = self.send('POST', [response(503), response(200)])
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(calls, 1)
+
+    def test_04_circuit_breaker(self):
+        RequestPolicy.configure(1.0, 1.0, 0)
+        for _ in range(CircuitBreaker.threshold):
+            self.send('GET', [NMSUnreachable('Connection refused')])
+
+        (error, calls) = self.send('GET', [response(200)])
+        self.assertIsInstance(error, CircuitOpen)
+        self.assertIn('Connection refused', str(error))
+        self.assertEqual(calls, 0)
+
+        # After the reset time one request is let through
+        CircuitBreaker.opened -= CircuitBreaker.reset_after
+        (res, calls) = self.send('GET', [response(200)])
+        self.assertEqual(res.status_code, 200)
+        self.assertIsNone(CircuitBreaker.opened)
+
+        # Every failed request is counted once, not every attempt
+        RequestPolicy.configure(1.0, 1.0, 2)
+        for _ in range(CircuitBreaker.threshold - 1):
+            self.send('GET', [NMSUnreachable('Connection refused')] * 3)
+        self.assertIsNone(CircuitBreaker.opened)
+
+    def closed_port(self):
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        port = listener.getsockname()[1]
+        listener.close()
+
+        return 'http://127.0.0.1:%d' % port
+
+    def test_05_error_cause(self):
+        RequestPolicy.configure(1.0, 1.0, 0)
+        (success, output) = Rest.request('GET', 'version', 'token',
+                                         self.closed_port())
+        self.assertFalse(success)
+        self.assertIn('Could not connect to the NMS', output)
+
+    def test_06_fanout_with_nms_down(self):
+        RequestPolicy.configure(1.0, 1.0, 0)
+        url = self.closed_port()
+        Inventory.configure(url, 'token')
+        (success, output) = show('device hostname a,b', 'token', url)
+        self.assertFalse(success)
+        self.assertIn('Could not get list of devices: Could not connect to '
+                      'the NMS', output)
+
+
+if __name__ == '__main__':
+    unittest.main()
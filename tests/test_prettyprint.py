@@ -0,0 +1,48 @@
+import unittest
+from unittest import mock
+
+from cli.prettyprint import prettyprint, prettyprint_diff, render_header
+
+
+class PrettyprintTests(unittest.TestCase):
+    def setUp(self):
+        self.patch = mock.patch('cli.prettyprint.terminal_size',
+                                return_value=(20, 10))
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_01_table(self):
+        data = {'data': {'devices': [
+            {'id': 1, 'hostname': 'a', 'serial': 'x'},
+            {'id': 2, 'hostname': 'b', 'state': 'MANAGED'},
+        ]}}
+        lines = prettyprint(data, 'devices').split('\n')
+        self.assertEqual(lines[0], ' ID    | Hostname             |'
+                                   ' State           |')
+        self.assertEqual(lines[1], '-' * 20)
+        self.assertEqual(lines[2], ' 1     | a                    |')
+        self.assertEqual(lines[3], ' 2     | b                    |'
+                                   ' MANAGED         |')
+
+    def test_02_detailed(self):
+        data = {'data': {'devices': [{'id': 1, 'serial': 'x'}]}}
+        output = prettyprint(data, 'devices', ' detailed')
+        self.assertIn('Serial', output)
+
+    def test_03_linknets(self):
+        data = {'data': {'linknets': [{'id': 1, 'device_a_id': 7,
+                                       'device_b_id': 8}]}}
+        with mock.patch('cli.prettyprint.ids_to_hostnames',
+                        return_value={7: 'esk-a1'}):
+            lines = prettyprint(data, 'linknets').split('\n')
+        self.assertEqual(lines[2], ' 1     | esk-a1               |')
+
+    def test_04_header(self):
+        self.assertEqual(render_header('ipv4_network'),
+                         ' Ipv4 network    |')
+
+    def test_05_diff(self):
+        diff = prettyprint_diff('@@ -1 +1 @@\\n-a\\n+b\\n c')
+        self.assertEqual(diff, '\n\033[91m -a\n\033[92m +b\n \033[0m c\n')
@@ -0,0 +1,23 @@
+import unittest
+
+from cli.session import close_session, get_session, new_session
+
+
+class SessionTests(unittest.TestCase):
+    def tearDown(self):
+        close_session()
+
+    def test_01_session_is_reused(self):
+        new_session(4)
+        self.assertIs(get_session(), get_session())
+
+    def test_02_pool_size(self):
+        new_session(4)
+        adapter = get_session().get_adapter('https://localhost')
+        self.assertEqual(adapter._pool_maxsize, 4)
+
+    def test_03_new_session(self):
+        new_session(4)
+        session = get_session()
+        new_session(8)
+        self.assertIsNot(get_session(), session)
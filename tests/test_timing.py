@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from cli.prettyprint import prettyprint_stream
+from cli.timing import UNTIMED, Timing
+
+DEVICES = {'status': 'success',
+           'data': {'devices': [{'id': x, 'hostname': 'esk-%d' % x}
+                                for x in range(100)]}}
+
+
+class TimingTests(unittest.TestCase):
+    def setUp(self):
+        Timing.configure(True)
+        Timing.reset()
+        self.patch = mock.patch('cli.prettyprint.terminal_size',
+                                return_value=(200, 50))
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        Timing.configure(False)
+        Timing.reset()
+
+    def test_01_nested_phases_are_not_counted_twice(self):
+        with Timing.command('show devices'):
+            with Timing.phase('parse'):
+                with Timing.phase('spec'):
+                    time.sleep(0.05)
+
+        record = Timing.last()
+        self.assertEqual(record['command'], 'show devices')
+        self.assertGreaterEqual(record['phases']['spec'], 0.05)
+        self.assertLess(record['phases']['parse'], 0.01)
+
+    def test_02_render_and_filter(self):
+        with Timing.command('show devices | grep esk-1'):
+            output = ''.join(prettyprint_stream(DEVICES, 'devices',
+                                                ' grep esk-1'))
+
+        self.assertIn('esk-10', output)
+        record = Timing.last()
+        self.assertIn('render', record['phases'])
+        self.assertIn('filter', record['phases'])
+        self.assertIn('Total', Timing.format(record))
+        self.assertIn('render', Timing.summary())
+
+    def test_03_disabled(self):
+        Timing.configure(False)
+        chunks = iter(['a'])
+
+        with Timing.command('show devices'):
+            self.assertIs(Timing.phase('spec'), UNTIMED)
+            self.assertIs(Timing.iterate('render', chunks), chunks)
+
+        self.assertIsNone(Timing.last())
+        self.assertEqual(Timing.records, [])
+
+    def test_04_export(self):
+        with Timing.command('show devices'):
+            Timing.add('ttfb', 0.5)
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'timing.json')
+            Timing.export(filename)
+            with open(filename) as fd:
+                data = json.load(fd)
+
+        self.assertEqual(data['commands'][0]['phases'], {'ttfb': 0.5})
+
+
+if __name__ == '__main__':
+    unittest.main()
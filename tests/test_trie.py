@@ -0,0 +1,22 @@
+import unittest
+
+from cli.trie import Trie
+
+
+class TrieTests(unittest.TestCase):
+    def test_01_prefix(self):
+        trie = Trie(['devices', 'device', 'device_init', 'groups', '|'])
+        self.assertEqual(trie.words('dev'),
+                         ['devices', 'device', 'device_init'])
+        self.assertEqual(trie.words('device_'), ['device_init'])
+        self.assertEqual(trie.words('x'), [])
+        self.assertEqual(trie.words(''), ['devices', 'device', 'device_init',
+                                          'groups', '|'])
+
+    def test_02_duplicates(self):
+        trie = Trie(['show', 'show'])
+        self.assertEqual(trie.words('s'), ['show'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -90,3 +90,12 @@ class CliTests(unittest.TestCase):
     def test_14_get_url_suffix(self):
         suffix = self.p.get_url_suffix('job', 'id')
         self.assertNotEqual(suffix, '')
+
+    def test_15_is_command(self):
+        self.assertEqual(self.p.is_command('device'), True)
+        self.assertEqual(self.p.is_command('nope'), False)
+
+    def test_16_unknown_command(self):
+        self.assertEqual(self.p.get_url('nope'), '')
+        self.assertEqual(self.p.get_attributes('nope'), [])
+        self.assertEqual(self.p.get_mandatory('devices', 'nope'), False)
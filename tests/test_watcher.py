@@ -0,0 +1,61 @@
+import unittest
+from unittest import mock
+
+from cli.engine import Engine
+from cli.rest import Rest
+from cli.watcher import JobWatcher
+
+
+def job(status):
+    return {'data': {'jobs': [{'id': 3, 'status': status}]}}
+
+
+class JobWatcherTests(unittest.TestCase):
+    def setUp(self):
+        JobWatcher.configure('http://localhost', 'token')
+        JobWatcher.notify = None
+
+    def test_01_jobs_are_watched(self):
+        JobWatcher.hook('GET', 'job', {'job_id': 1})
+        JobWatcher.hook('POST', 'sync', {'job_id': 3})
+        self.assertEqual(JobWatcher.active(), [3])
+        self.assertIn('sync', JobWatcher.watched())
+
+    def test_02_reports_are_kept_until_prompt(self):
+        JobWatcher.hook('POST', 'sync', {'job_id': 3})
+
+        with mock.patch.object(Rest, 'afetch', return_value=job('RUNNING')):
+            Engine.run(JobWatcher.poll(3))
+        self.assertEqual(JobWatcher.prompt(False), [])
+
+        with mock.patch.object(Rest, 'afetch', return_value=job('FINISHED')):
+            Engine.run(JobWatcher.poll(3))
+        self.assertEqual(JobWatcher.active(), [])
+
+        messages = JobWatcher.prompt(True)
+        self.assertEqual(len(messages), 1)
+        self.assertIn('Job 3 (sync) is done with status FINISHED',
+                      messages[0])
+
+    def test_03_notify_at_prompt(self):
+        notify = mock.Mock()
+        JobWatcher.notify = notify
+        JobWatcher.prompt(True)
+        JobWatcher.hook('POST', 'sync', {'job_id': 3})
+
+        with mock.patch.object(Rest, 'afetch',
+                               return_value=job('EXCEPTION')):
+            Engine.run(JobWatcher.poll(3))
+
+        JobWatcher.prompt(False)
+        notify.assert_called_once()
+
+    def test_04_notify_may_use_watcher(self):
+        JobWatcher.notify = lambda message: JobWatcher.active()
+        JobWatcher.prompt(True)
+        JobWatcher.report('Job 1 is done')
+        JobWatcher.prompt(False)
+
+
+if __name__ == '__main__':
+    unittest.main()